@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""Pre-compiled patterns shared by the symbol maintenance scripts"""
+
+import re
+
+# Descriptive part of a symbol filename like 'pid_iso_equipment_000_tank_general_basin'
+# (the standard is matched but not captured)
+SYMBOL_FILENAME = re.compile(r'pid_(?:iso|pip)_[a-z_]+_\d{3}_(.+)')
+
+# The name: '...' field of an allSymbols.ts entry
+TS_NAME_LINE = re.compile(r"name: '([^']+)'")
+
+# Generated name prefixes stripped by fix_symbol_names.py
+PIPES_PREFIX = re.compile(r'^Pid Iso Pipes Signal \d{3} ')
+ISO_PREFIX = re.compile(r'^Pid Iso \w+ \d{3} ')
@@ -1,39 +1,36 @@
 #!/usr/bin/env python3
 
-import re
+import io
+import os
 
-# Read the allSymbols.ts file
-with open('/home/thirakorn/astar-projects/hazop-ai/apps/pid-editor-tauri/src/lib/data/allSymbols.ts', 'r') as f:
-    content = f.read()
+from _regexes import ISO_PREFIX, PIPES_PREFIX, TS_NAME_LINE
+
+SYMBOLS_FILE = '/home/thirakorn/astar-projects/hazop-ai/apps/pid-editor-tauri/src/lib/data/allSymbols.ts'
+BUFFER_SIZE = 1 << 17  # 128 KiB
 
 # Function to clean up names
 def clean_name(name):
-    # Remove "Pid Iso Pipes Signal XXX " prefix
-    name = re.sub(r'^Pid Iso Pipes Signal \d{3} ', '', name)
-    # Remove "Pid Iso " prefix from other categories
-    name = re.sub(r'^Pid Iso \w+ \d{3} ', '', name)
-    # Title case the result
-    words = name.split()
-    return ' '.join(word.capitalize() for word in words)
-
-# Process each line
-lines = content.split('\n')
-new_lines = []
+    # Remove "Pid Iso Pipes Signal XXX " prefix, then "Pid Iso " prefix from
+    # other categories, and title case the result
+    return ' '.join(w.capitalize() for w in ISO_PREFIX.sub('', PIPES_PREFIX.sub('', name)).split())
 
-for line in lines:
-    # Check if this is a pipes/signals symbol line
-    if "name: 'Pid Iso Pipes Signal" in line:
-        # Extract the name
-        match = re.search(r"name: '([^']+)'", line)
-        if match:
-            old_name = match.group(1)
-            new_name = clean_name(old_name)
-            line = line.replace(f"name: '{old_name}'", f"name: '{new_name}'")
-    
-    new_lines.append(line)
+def transform(line):
+    # Only pipes/signals symbol lines need fixing; hand everything else back untouched
+    if 'Pid Iso Pipes Signal' not in line:
+        return line
+    # Extract the name
+    match = TS_NAME_LINE.search(line)
+    if not match or not match.group(1).startswith('Pid Iso Pipes Signal'):
+        return line
+    start, end = match.span(1)
+    return line[:start] + clean_name(match.group(1)) + line[end:]
 
-# Write back the modified content
-with open('/home/thirakorn/astar-projects/hazop-ai/apps/pid-editor-tauri/src/lib/data/allSymbols.ts', 'w') as f:
-    f.write('\n'.join(new_lines))
+# Stream the file into a sibling temp file, then atomically swap it in
+tmp_file = SYMBOLS_FILE + '.tmp'
+with io.open(SYMBOLS_FILE, 'r', buffering=BUFFER_SIZE) as fi, \
+        io.open(tmp_file, 'w', buffering=BUFFER_SIZE) as fo:
+    for line in fi:
+        fo.write(transform(line))
+os.replace(tmp_file, SYMBOLS_FILE)
 
-print("Fixed symbol names in allSymbols.ts")
\ No newline at end of file
+print("Fixed symbol names in allSymbols.ts")
@@ -2,67 +2,80 @@
 import os
 import json
 import re
+from collections import Counter
 from pathlib import Path
 
+from _regexes import SYMBOL_FILENAME
+
+# Category mappings
+CATEGORY_MAP = {
+    'equipment': 'equipment',
+    'equipments': 'equipment',
+    'valves': 'valves',
+    'instruments': 'instruments',
+    'fittings': 'fittings',
+    'pipes-and-signal-lines': 'pipes',
+    'pipes_and_signal_lines': 'pipes'
+}
+
+# Any category key, found in a single scan of the folder name
+_CAT_RE = re.compile('|'.join(map(re.escape, CATEGORY_MAP)))
+
 def extract_name_from_filename(filename):
     """Extract human-readable name from filename like 'pid_iso_equipment_000_tank_general_basin.svg'"""
     # Remove extension
     name = filename.replace('.svg', '')
     # Remove prefix pattern (pid_iso_category_nnn_)
-    match = re.match(r'pid_(iso|pip)_[a-z_]+_\d{3}_(.+)', name)
+    match = SYMBOL_FILENAME.match(name) if name.startswith(('pid_iso_', 'pid_pip_')) else None
     if match:
         # Convert underscores to spaces and title case
-        raw_name = match.group(2)
-        return raw_name.replace('_', ' ').title()
+        return match.group(1).replace('_', ' ').title()
     else:
         # Fallback for files without descriptive names
-        return name.split('_')[-1].title()
+        return name.rsplit('_', 1)[-1].title()
 
 def generate_symbol_data():
     """Generate JavaScript array of all symbols"""
     base_path = Path("/Users/thirakorn/GitHub/hazop-ai/assests/Symbols/PID-Symbols")
     symbols = []
     
-    # Category mappings
-    category_map = {
-        'equipment': 'equipment',
-        'equipments': 'equipment',
-        'valves': 'valves',
-        'instruments': 'instruments',
-        'fittings': 'fittings',
-        'pipes-and-signal-lines': 'pipes',
-        'pipes_and_signal_lines': 'pipes'
-    }
-    
     # Process each standard
     for standard in ['ISO', 'PIP']:
-        standard_path = base_path / standard
+        standard_path = os.path.join(base_path, standard)
+        if not os.path.isdir(standard_path):
+            continue
+        
+        # Category folders (what glob('PID-*-Symbols') matched), kept in
+        # directory order since the generated ids are numbered by position
+        with os.scandir(standard_path) as it:
+            folder_names = [e.name for e in it
+                            if len(e.name) >= len('PID--Symbols') and e.name.startswith('PID-')
+                            and e.name.endswith('-Symbols') and e.is_dir()]
         
         # Process each category folder
-        for category_folder in standard_path.glob('PID-*-Symbols'):
-            svg_folder = category_folder / 'svg'
-            if not svg_folder.exists():
+        for category_folder_name in folder_names:
+            svg_folder = os.path.join(standard_path, category_folder_name, 'svg')
+            if not os.path.isdir(svg_folder):
                 continue
                 
             # Extract category from folder name
-            folder_name = category_folder.name.lower()
-            category = None
-            for key in category_map:
-                if key in folder_name:
-                    category = category_map[key]
-                    break
+            folder_name = category_folder_name.lower()
+            match = _CAT_RE.search(folder_name)
+            category = CATEGORY_MAP[match.group(0)] if match else None
             
             if not category:
                 continue
             
             # Process each SVG file
-            for svg_file in sorted(svg_folder.glob('*.svg')):
-                filename = svg_file.name
+            with os.scandir(svg_folder) as it:
+                svg_files = sorted(e.name for e in it if e.name.endswith('.svg') and e.is_file())
+            
+            for filename in svg_files:
                 symbol_id = f"{standard.lower()}_{category}_{len(symbols)}"
                 name = extract_name_from_filename(filename)
                 
                 # Create relative path for web access
-                relative_path = f"/symbols/{standard}/{category_folder.name}/svg/{filename}"
+                relative_path = f"/symbols/{standard}/{category_folder_name}/svg/{filename}"
                 
                 symbols.append({
                     'id': symbol_id,
@@ -74,45 +87,42 @@ def generate_symbol_data():
     
     return symbols
 
-def write_typescript_file(symbols):
-    """Write TypeScript file with all symbol definitions"""
-    output = """// Auto-generated symbol definitions
+def typescript_lines(symbols, standard_counts):
+    """Yield the lines of the TypeScript file with all symbol definitions"""
+    yield """// Auto-generated symbol definitions
 // Generated from actual symbol files in assests/Symbols/PID-Symbols
 
 export const allSymbols = [
 """
     
     for symbol in symbols:
-        output += f"  {{ id: '{symbol['id']}', name: '{symbol['name']}', category: '{symbol['category']}', standard: '{symbol['standard']}', path: '{symbol['path']}' }},\n"
-    
-    output += "];\n"
+        yield f"  {{ id: '{symbol['id']}', name: '{symbol['name']}', category: '{symbol['category']}', standard: '{symbol['standard']}', path: '{symbol['path']}' }},\n"
     
-    output += f"\n// Total symbols: {len(symbols)}\n"
-    output += f"// ISO symbols: {len([s for s in symbols if s['standard'] == 'ISO'])}\n"
-    output += f"// PIP symbols: {len([s for s in symbols if s['standard'] == 'PIP'])}\n"
+    yield "];\n"
     
-    return output
+    yield f"\n// Total symbols: {len(symbols)}\n"
+    yield f"// ISO symbols: {standard_counts['ISO']}\n"
+    yield f"// PIP symbols: {standard_counts['PIP']}\n"
 
 def main():
     print("Generating symbol list from actual files...")
     symbols = generate_symbol_data()
     
-    # Write TypeScript file
-    ts_content = write_typescript_file(symbols)
+    standard_counts = Counter(s['standard'] for s in symbols)
+    
+    # Stream the TypeScript file straight to disk
     output_path = Path("/Users/thirakorn/GitHub/hazop-ai/apps/pid-editor-tauri/src/lib/data/allSymbols.ts")
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(ts_content)
+    with output_path.open('w', buffering=1 << 17) as fo:
+        fo.writelines(typescript_lines(symbols, standard_counts))
     
     print(f"Generated {len(symbols)} symbols")
-    print(f"ISO: {len([s for s in symbols if s['standard'] == 'ISO'])} symbols")
-    print(f"PIP: {len([s for s in symbols if s['standard'] == 'PIP'])} symbols")
+    print(f"ISO: {standard_counts['ISO']} symbols")
+    print(f"PIP: {standard_counts['PIP']} symbols")
     print(f"Output written to: {output_path}")
     
     # Print category breakdown
-    categories = {}
-    for symbol in symbols:
-        key = f"{symbol['standard']} - {symbol['category']}"
-        categories[key] = categories.get(key, 0) + 1
+    categories = Counter(f"{s['standard']} - {s['category']}" for s in symbols)
     
     print("\nBreakdown by category:")
     for cat, count in sorted(categories.items()):
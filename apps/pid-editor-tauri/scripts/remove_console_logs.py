@@ -2,19 +2,225 @@
 
 import re
 
-# Read the InnerCanvas.svelte file
-with open('/home/thirakorn/astar-projects/hazop-ai/apps/pid-editor-tauri/src/lib/components/InnerCanvas.svelte', 'r') as f:
-    content = f.read()
+# Tokens the scanners stop at: a call to strip, string/template literal,
+# comment and regex literal openers
+_SCAN_RE = re.compile(r'console\.log\(|[\'"`/]')
+_CALL_RE = re.compile(r'[()\'"`/]')
+_BRACE_RE = re.compile(r'[{}\'"`/]')
+_TEMPLATE_RE = re.compile(r'\\.|`|\$\{', re.DOTALL)
 
-# Remove console.log statements (including multi-line ones)
-# Pattern matches console.log followed by anything until semicolon or newline
-content = re.sub(r'\s*console\.log\([^;]*\);?\n?', '', content)
+# Characters and keywords after which a '/' starts a regex literal rather
+# than a division
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'yield', 'await')
 
-# Clean up any double blank lines left behind
-content = re.sub(r'\n\s*\n\s*\n', '\n\n', content)
+# <script> blocks of a .svelte component; everything else is markup
+_SCRIPT_RE = re.compile(r'(<script\b[^>]*>)(.*?)(</script\s*>)', re.DOTALL | re.IGNORECASE)
 
-# Write back the modified content
-with open('/home/thirakorn/astar-projects/hazop-ai/apps/pid-editor-tauri/src/lib/components/InnerCanvas.svelte', 'w') as f:
-    f.write(content)
+def _starts_regex(src: str, j: int) -> bool:
+    """Tell whether the '/' at j opens a regex literal, judging by what precedes it."""
+    k = j - 1
+    while k >= 0 and src[k] in ' \t\r\n':
+        k -= 1
+    if k < 0 or src[k] in _REGEX_PRECEDERS:
+        return True
+    if src[k].isalnum() or src[k] in '_$':
+        start = k
+        while start > 0 and (src[start - 1].isalnum() or src[start - 1] in '_$'):
+            start -= 1
+        return src[start:k + 1] in _REGEX_KEYWORDS
+    return False
 
-print("Removed all console.log statements from InnerCanvas.svelte")
\ No newline at end of file
+def _skip_template(src: str, j: int) -> int:
+    """Return the index just past the template literal whose body starts at j."""
+    while True:
+        m = _TEMPLATE_RE.search(src, j)
+        if m is None:
+            return len(src)
+        if m.group() == '`':
+            return m.end()
+        if m.group() == '${':
+            j = _skip_braces(src, m.end())
+        else:
+            j = m.end()
+
+def _skip_braces(src: str, j: int) -> int:
+    """Return the index just past the '}' closing the ${ or { opened before j."""
+    depth = 1
+    while True:
+        m = _BRACE_RE.search(src, j)
+        if m is None:
+            return len(src)
+        tok = m.group()
+        if tok == '{':
+            depth += 1
+            j = m.end()
+        elif tok == '}':
+            depth -= 1
+            j = m.end()
+            if not depth:
+                return j
+        else:
+            j = _skip_literal(src, m.start())
+
+def _skip_literal(src: str, j: int) -> int:
+    """Return the index just past the literal or comment at j.
+
+    Handles strings, template literals (including nested ${...}),
+    comments and regex literals; a '/' that is a division is stepped over.
+    """
+    n = len(src)
+    c = src[j]
+    if c in '\'"':
+        # Skip string literal, honouring escapes
+        j += 1
+        while j < n and src[j] != c:
+            j += 2 if src[j] == '\\' else 1
+        return j + 1
+    if c == '`':
+        return _skip_template(src, j + 1)
+    if src.startswith('//', j):
+        end = src.find('\n', j)
+        return n if end == -1 else end
+    if src.startswith('/*', j):
+        end = src.find('*/', j + 2)
+        return n if end == -1 else end + 2
+    if not _starts_regex(src, j):
+        return j + 1
+    # Regex literal: runs to the next unescaped '/' outside a [...] class,
+    # and never past the end of the line
+    j += 1
+    in_class = False
+    while j < n and src[j] != '\n':
+        c = src[j]
+        if c == '\\':
+            j += 2
+            continue
+        if c == '[':
+            in_class = True
+        elif c == ']':
+            in_class = False
+        elif c == '/' and not in_class:
+            return j + 1
+        j += 1
+    return j
+
+def _call_end(src: str, j: int) -> int:
+    """Return the index just past the paren closing the call opened before j, or -1."""
+    depth = 1
+    while True:
+        m = _CALL_RE.search(src, j)
+        if m is None:
+            return -1
+        tok = m.group()
+        if tok == '(':
+            depth += 1
+            j = m.end()
+        elif tok == ')':
+            depth -= 1
+            j = m.end()
+            if not depth:
+                return j
+        else:
+            j = _skip_literal(src, m.start())
+
+def strip_console_logs(src: str) -> str:
+    """Remove console.log(...) calls in a single linear pass.
+
+    Scans forward skipping over string, template and regex literals and
+    comments, so calls inside them (commented-out or quoted) are left
+    alone, and walks each
+    real call to its matching close paren so arguments containing `;`,
+    `)` or nested calls are handled correctly.
+    """
+    parts = []
+    prev = 0
+    i = 0
+    n = len(src)
+    while True:
+        m = _SCAN_RE.search(src, i)
+        if m is None:
+            break
+        start = m.start()
+        if m.group() != 'console.log(':
+            i = _skip_literal(src, start)
+            continue
+
+        j = _call_end(src, m.end())
+        if j == -1:
+            # Unterminated call, leave just this candidate alone
+            i = m.end()
+            continue
+
+        # Swallow optional semicolon and trailing newline
+        if j < n and src[j] == ';':
+            j += 1
+        if j < n and src[j] == '\n':
+            j += 1
+
+        # Also drop the indentation in front of the call
+        while start > prev and src[start - 1] in ' \t':
+            start -= 1
+
+        parts.append(src[prev:start])
+        prev = i = j
+
+    return ''.join(parts) + src[prev:]
+
+def strip_svelte_console_logs(src: str) -> str:
+    """Remove console.log(...) calls from the <script> blocks of a Svelte component.
+
+    Markup is left untouched, so text like `Don't` is never mistaken for
+    the start of a string.
+    """
+    return _SCRIPT_RE.sub(lambda m: m.group(1) + strip_console_logs(m.group(2)) + m.group(3), src)
+
+def collapse_blank_lines(src: str) -> str:
+    """Collapse every run of two or more blank lines into a single empty line.
+
+    Same result as re.sub(r'\n\s*\n\s*\n', '\n\n', src): only '\n' ends a
+    line, and whitespace before the run's first newline and after its last
+    one (the start and end of the text included) is kept.
+    """
+    lines = src.split('\n')
+    if len(lines) < 4:
+        # A run needs at least three newlines
+        return src
+    out = [lines[0]]
+    blank = None    # first blank line of the current run
+    run = 0
+    for line in lines[1:-1]:
+        if not line.strip():
+            if not run:
+                blank = line
+            run += 1
+            continue
+        if run:
+            # A lone blank line is kept as-is, longer runs shrink to one
+            out.append(blank if run == 1 else '')
+            run = 0
+        out.append(line)
+    if run:
+        out.append(blank if run == 1 else '')
+    out.append(lines[-1])
+    return '\n'.join(out)
+
+def main():
+    # Read the InnerCanvas.svelte file
+    with open('/home/thirakorn/astar-projects/hazop-ai/apps/pid-editor-tauri/src/lib/components/InnerCanvas.svelte', 'r') as f:
+        content = f.read()
+
+    # Remove console.log statements (including multi-line ones)
+    content = strip_svelte_console_logs(content)
+
+    # Clean up any double blank lines left behind
+    content = collapse_blank_lines(content)
+
+    # Write back the modified content
+    with open('/home/thirakorn/astar-projects/hazop-ai/apps/pid-editor-tauri/src/lib/components/InnerCanvas.svelte', 'w') as f:
+        f.write(content)
+
+    print("Removed all console.log statements from InnerCanvas.svelte")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Tests for the console.log stripper and blank-line collapse in remove_console_logs.py
+
+Run with `python -m unittest test_remove_console_logs` from this directory.
+"""
+
+import random
+import re
+import unittest
+
+from remove_console_logs import collapse_blank_lines, strip_console_logs, strip_svelte_console_logs
+
+
+class StripConsoleLogsTest(unittest.TestCase):
+    def test_removes_simple_calls(self):
+        src = "foo();\n  console.log('a;b', f(1));\nbar();\n"
+        self.assertEqual(strip_console_logs(src), "foo();\nbar();\n")
+
+    def test_leaves_commented_and_quoted_calls(self):
+        src = "// console.log(a)\n/* console.log(b) */\nconst s = \"console.log(\";\nconsole.log(c);\n"
+        self.assertEqual(strip_console_logs(src),
+                         "// console.log(a)\n/* console.log(b) */\nconst s = \"console.log(\";\n")
+
+    def test_url_string_is_not_a_comment(self):
+        src = "const u = 'http://x';\nconsole.log(u);\nrest();\n"
+        self.assertEqual(strip_console_logs(src), "const u = 'http://x';\nrest();\n")
+
+    def test_unbalanced_candidate_only_skips_itself(self):
+        src = "console.log(1\nrest\nconsole.log(2);\n"
+        self.assertEqual(strip_console_logs(src), "console.log(1\nrest\n")
+
+    def test_template_literal_with_nested_substitution(self):
+        src = "a();\nconsole.log(`t ${fn(`x)`)} done`);\nb();\n"
+        self.assertEqual(strip_console_logs(src), "a();\nb();\n")
+
+    def test_template_substitution_with_braces_and_strings(self):
+        src = "console.log(`${ {a: '}'}.a } ${`${1}`}`);\nkeep();\n"
+        self.assertEqual(strip_console_logs(src), "keep();\n")
+
+    def test_regex_literal_quote_is_not_a_string(self):
+        src = "const re = /'/g;\nconsole.log(re);\nkeep();\n"
+        self.assertEqual(strip_console_logs(src), "const re = /'/g;\nkeep();\n")
+
+    def test_division_is_not_a_regex(self):
+        src = "const x = a / b;\nconsole.log(x / 2);\nkeep();\n"
+        self.assertEqual(strip_console_logs(src), "const x = a / b;\nkeep();\n")
+
+
+class StripSvelteConsoleLogsTest(unittest.TestCase):
+    def test_only_script_blocks_are_scanned(self):
+        src = (
+            "<script>\n  let a = 1;\n  console.log(a);\n</script>\n\n"
+            "<p>Don't {a}</p>\n"
+            "<script context=\"module\">\n  console.log('m');\n  export const b = 2;\n</script>\n"
+            "<p>console.log(x)</p>\n"
+        )
+        self.assertEqual(strip_svelte_console_logs(src), (
+            "<script>\n  let a = 1;\n</script>\n\n"
+            "<p>Don't {a}</p>\n"
+            "<script context=\"module\">\n  export const b = 2;\n</script>\n"
+            "<p>console.log(x)</p>\n"
+        ))
+
+
+class CollapseBlankLinesTest(unittest.TestCase):
+    def old_collapse(self, src):
+        # The substitution collapse_blank_lines replaced
+        return re.sub(r'\n\s*\n\s*\n', '\n\n', src)
+
+    def test_examples(self):
+        cases = ["\n\nfoo\n", "\n\n\nfoo", "a\n\n\n\nb\n", "a  \n \n\t\n  b", "a\n\n", "a\n\n\n"]
+        for src in cases:
+            self.assertEqual(collapse_blank_lines(src), self.old_collapse(src), repr(src))
+
+    def test_matches_old_regex(self):
+        rng = random.Random(0)
+        pieces = ['\n', ' ', '\t', '\r', '\x0c', '\u2028', '\x1c', 'a', 'b;']
+        for _ in range(20000):
+            src = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+            self.assertEqual(collapse_blank_lines(src), self.old_collapse(src), repr(src))
+
+
+if __name__ == "__main__":
+    unittest.main()
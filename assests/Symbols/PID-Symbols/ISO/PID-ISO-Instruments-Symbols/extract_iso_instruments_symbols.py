@@ -5,23 +5,89 @@ Extracts P&ID instruments symbols from JSON to individual SVG files with proper
 Optionally converts SVG files to PNG format
 """
 
+import functools
+import itertools
 import json
 import os
 import re
+import string
 import shutil
 import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from pathlib import Path
 import subprocess
 import sys
 
+try:
+    # Optional: stream symbols from the JSON instead of loading it whole
+    import ijson
+except ImportError:
+    ijson = None
+
+
+# Non-standard v: attributes (v:unit, v:flip, v:layer, etc.)
+_V_ATTR_RE = re.compile(r'\s+v:\w+="[^"]*"')
+
+# Drops punctuation (except '_') and turns '-' into a separator for clean_filename
+_FILENAME_TRANS = str.maketrans({c: None for c in string.punctuation if c not in '-_'} | {'-': ' '})
+
+# Opening tags of shape elements that get stroke/fill fixes in clean_svg_content
+_SHAPE_RE = re.compile(r'<(path|rect|circle|ellipse|polygon|polyline)\b[^>]*>')
+
+
+def _fix_shape(match):
+    """Add stroke color and appropriate fill to a single shape tag"""
+    tag_text = match.group(0)
+    
+    # Add stroke color if missing but has stroke-width
+    if 'stroke-width=' in tag_text and 'stroke=' not in tag_text:
+        tag_text = tag_text.replace('stroke-width=', 'stroke="#000000" stroke-width=')
+    
+    # For instruments: determine appropriate fill
+    if 'fill=' in tag_text or ('stroke=' not in tag_text and 'stroke-width=' not in tag_text):
+        return tag_text
+    
+    tag = match.group(1)
+    if 'stroke="#ff0000"' in tag_text:
+        # Red markers (connection points) should have no fill
+        fill = 'none'
+    elif tag in ('ellipse', 'circle', 'rect'):
+        # Circles/ellipses typically represent the instrument body,
+        # rectangles can be frames or indicators
+        fill = 'white'
+    elif tag in ('polygon', 'path'):
+        # Closed paths (hexagon transmitters etc.) are instrument bodies,
+        # open paths are just lines
+        fill = 'white' if 'Z' in tag_text or tag == 'polygon' else 'none'
+    else:
+        # Default to no fill for lines
+        fill = 'none'
+    end = len(tag) + 1
+    return f'{tag_text[:end]} fill="{fill}"{tag_text[end:]}'
+
+
+def _iter_fixed_shapes(svg_content):
+    """Yield svg_content in pieces with every shape tag passed through _fix_shape"""
+    pos = 0
+    for match in _SHAPE_RE.finditer(svg_content):
+        yield svg_content[pos:match.start()]
+        yield _fix_shape(match)
+        pos = match.end()
+    yield svg_content[pos:]
+
 
 class ISOInstrumentsExtractor:
     def __init__(self, json_file='pid-iso-instruments.json', svg_file='pid-iso-instruments.svg'):
         self.json_file = json_file
         self.svg_file = svg_file
         self.output_dir = 'svg'
+        self._out_dir_fd = None
+        self._tool = None
         self.symbol_data = {}
+        self.symbol_keys = []
         self.symbol_names = {}
+        self.red_marker_count = 0
         
         # Define instruments symbol names based on common P&ID instrument types
         self.predefined_names = {
@@ -44,9 +110,17 @@ class ISOInstrumentsExtractor:
         }
         
     def clean_svg_content(self, svg_content):
-        """Clean and fix SVG content to be valid"""
+        """Clean and fix SVG content to be valid
+        
+        Returns (fragments, has_red): fragments is an iterator over the pieces
+        of the cleaned SVG, ready for writelines() without joining them first,
+        and has_red tells whether the symbol carries red connection markers,
+        so callers need not rescan it.
+        """
+        has_red = 'stroke="#ff0000"' in svg_content
+        
         # Remove non-standard v: attributes (v:unit, v:flip, v:layer, etc.)
-        svg_content = re.sub(r'\s+v:\w+="[^"]*"', '', svg_content)
+        svg_content = _V_ATTR_RE.sub('', svg_content)
         
         # Fix HTML entities in attributes
         svg_content = svg_content.replace('&quot;', '"')
@@ -60,74 +134,30 @@ class ISOInstrumentsExtractor:
             svg_content = svg_content.replace('<svg', '<svg xmlns:xlink="http://www.w3.org/1999/xlink"', 1)
         
         # Fix shapes: add stroke color and appropriate fill for P&ID symbols
-        lines = svg_content.split('>')
-        fixed_lines = []
-        for line in lines:
-            # Handle paths, rects, circles, ellipses, polygons, polylines
-            shape_tags = ['<path', '<rect', '<circle', '<ellipse', '<polygon', '<polyline']
-            is_shape = any(tag in line for tag in shape_tags)
-            
-            if is_shape:
-                # Add stroke color if missing but has stroke-width
-                if 'stroke-width=' in line and 'stroke=' not in line and 'stroke="#ff0000"' not in line:
-                    # Check if it's explicitly black
-                    if 'stroke="#000000"' not in line:
-                        line = line.replace('stroke-width=', 'stroke="#000000" stroke-width=')
-                
-                # For instruments: determine appropriate fill
-                if 'fill=' not in line and ('stroke=' in line or 'stroke-width=' in line):
-                    # Check if it's a red marker (connection point)
-                    if 'stroke="#ff0000"' in line:
-                        # Red markers should have no fill
-                        for tag in shape_tags:
-                            if tag in line:
-                                line = line.replace(tag, f'{tag} fill="none"')
-                                break
-                    else:
-                        # Regular instrument elements
-                        if '<ellipse' in line or '<circle' in line:
-                            # Circles/ellipses in instruments typically represent the instrument body
-                            # Check for existing fills
-                            if 'fill="#ffffff"' not in line and 'fill="#000000"' not in line:
-                                line = line.replace('<ellipse', '<ellipse fill="white"')
-                                line = line.replace('<circle', '<circle fill="white"')
-                        elif '<rect' in line:
-                            # Rectangles in instruments can be frames or indicators
-                            if 'fill="#ffffff"' not in line and 'fill="#000000"' not in line:
-                                line = line.replace('<rect', '<rect fill="white"')
-                        elif '<polygon' in line or '<path' in line:
-                            # Check for hexagon shapes (transmitters) and other complex paths
-                            if 'Z' in line or '<polygon' in line:
-                                # Closed paths for instrument bodies
-                                if 'fill="#ffffff"' not in line and 'fill="#000000"' not in line:
-                                    for tag in shape_tags:
-                                        if tag in line:
-                                            line = line.replace(tag, f'{tag} fill="white"')
-                                            break
-                            else:
-                                # Open paths are just lines
-                                for tag in shape_tags:
-                                    if tag in line:
-                                        line = line.replace(tag, f'{tag} fill="none"')
-                                        break
-                        else:
-                            # Default to no fill for lines
-                            for tag in shape_tags:
-                                if tag in line:
-                                    line = line.replace(tag, f'{tag} fill="none"')
-                                    break
-            
-            fixed_lines.append(line)
-        svg_content = '>'.join(fixed_lines)
+        fragments = _iter_fixed_shapes(svg_content)
         
         # Add XML declaration if missing
         if not svg_content.startswith('<?xml'):
-            svg_content = '<?xml version="1.0" encoding="UTF-8"?>\n' + svg_content
+            fragments = itertools.chain(('<?xml version="1.0" encoding="UTF-8"?>\n',), fragments)
         
-        return svg_content
+        return fragments, has_red
     
     def load_json_data(self):
         """Load symbol data from JSON file"""
+        if ijson is not None:
+            # Symbols are parsed one at a time during extraction; this pass
+            # only checks the file is well-formed and counts the symbols
+            print(f"Streaming JSON data from {self.json_file}...")
+            try:
+                with open(self.json_file, 'rb') as f:
+                    count = sum(1 for prefix, event, _ in ijson.parse(f)
+                                if prefix == '' and event == 'map_key')
+                print(f"✅ Loaded {count} symbols")
+                return True
+            except Exception as e:
+                print(f"❌ Error loading JSON: {e}")
+                return False
+        
         print(f"Loading JSON data from {self.json_file}...")
         try:
             with open(self.json_file, 'r') as f:
@@ -138,6 +168,15 @@ class ISOInstrumentsExtractor:
             print(f"❌ Error loading JSON: {e}")
             return False
     
+    def iter_symbols(self):
+        """Yield (key, svg_content) pairs, streaming from disk when ijson is available"""
+        if ijson is None:
+            yield from self.symbol_data.items()
+            return
+        
+        with open(self.json_file, 'rb') as f:
+            yield from ijson.kvitems(f, '')
+    
     def extract_symbol_names(self):
         """Extract symbol names from the original SVG file or use predefined names"""
         print(f"\nSetting up symbol names...")
@@ -170,12 +209,43 @@ class ISOInstrumentsExtractor:
             print(f"   Using {len(self.symbol_names)} predefined names")
             return len(self.symbol_names) > 0
     
-    def clean_filename(self, name):
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def clean_filename(name):
         """Clean symbol name for use as filename"""
         # Remove special characters and convert to lowercase with underscores
-        name = re.sub(r'[^\w\s-]', '', name)
-        name = re.sub(r'[-\s]+', '_', name)
-        return name.lower()
+        return '_'.join(name.translate(_FILENAME_TRANS).split()).lower()
+    
+    def _write_one(self, key, svg_content, use_names=True):
+        """Clean a single symbol and write it to the output directory"""
+        idx = int(key)
+        
+        # Clean and fix SVG content
+        fragments, has_red = self.clean_svg_content(svg_content)
+        
+        # Create filename
+        name = self.symbol_names[key] if use_names and key in self.symbol_names else None
+        if name is not None:
+            clean_name = self.clean_filename(name)
+            filename = f"pid_iso_instruments_{idx:03d}_{clean_name}.svg"
+        else:
+            filename = f"pid_iso_instruments_{idx:03d}.svg"
+        
+        # Encode once and write the bytes straight to the fd, skipping the
+        # buffered text file layer
+        data = memoryview(''.join(fragments).encode('utf-8'))
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        if self._out_dir_fd is not None:
+            fd = os.open(filename, flags, 0o644, dir_fd=self._out_dir_fd)
+        else:
+            fd = os.open(os.path.join(self.output_dir, filename), flags, 0o644)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+        
+        return key, filename, name, has_red
     
     def extract_symbols(self, use_names=True):
         """Extract symbols from JSON to individual SVG files"""
@@ -184,32 +254,39 @@ class ISOInstrumentsExtractor:
         
         print(f"\nExtracting symbols to {self.output_dir}/...")
         
+        # Resolve the output directory once for all writes where supported
+        if os.open in os.supports_dir_fd and hasattr(os, 'O_DIRECTORY'):
+            self._out_dir_fd = os.open(self.output_dir, os.O_RDONLY | os.O_DIRECTORY)
+        
+        # Symbols are independent, so clean and write them concurrently
+        workers = min(32, (os.cpu_count() or 1) * 4)
         extracted_count = 0
-        for key, svg_content in self.symbol_data.items():
-            idx = int(key)
-            
-            # Clean and fix SVG content
-            clean_svg = self.clean_svg_content(svg_content)
-            
-            # Create filename
-            if use_names and key in self.symbol_names:
-                clean_name = self.clean_filename(self.symbol_names[key])
-                filename = f"pid_iso_instruments_{idx:03d}_{clean_name}.svg"
-            else:
-                filename = f"pid_iso_instruments_{idx:03d}.svg"
-            
-            filepath = os.path.join(self.output_dir, filename)
-            
-            # Write to file
-            with open(filepath, 'w') as f:
-                f.write(clean_svg)
-            
-            if use_names and key in self.symbol_names:
-                print(f"  {idx:03d}: {filename} ({self.symbol_names[key]})")
-            else:
-                print(f"  {idx:03d}: {filename}")
-            
-            extracted_count += 1
+        self.symbol_keys = []
+        self.red_marker_count = 0
+        # executor.map submits its whole input up front, so hand symbols over
+        # in bounded batches to keep a streamed JSON from piling up in memory
+        symbols = self.iter_symbols()
+        batch_size = workers * 4
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                while batch := list(itertools.islice(symbols, batch_size)):
+                    results = executor.map(lambda item: self._write_one(*item, use_names), batch)
+                    for key, filename, name, has_red in results:
+                        # Keep what the CSV and analysis need rather than the SVG bodies
+                        self.symbol_keys.append(key)
+                        self.red_marker_count += has_red
+                        
+                        idx = int(key)
+                        if name is not None:
+                            print(f"  {idx:03d}: {filename} ({name})")
+                        else:
+                            print(f"  {idx:03d}: {filename}")
+                        
+                        extracted_count += 1
+        finally:
+            if self._out_dir_fd is not None:
+                os.close(self._out_dir_fd)
+                self._out_dir_fd = None
         
         print(f"\n✅ Successfully extracted {extracted_count} symbols")
         return extracted_count
@@ -221,7 +298,7 @@ class ISOInstrumentsExtractor:
         
         with open(csv_path, 'w') as f:
             f.write("Index,Filename,Description,Category\n")
-            for key in sorted(self.symbol_data.keys(), key=lambda x: int(x)):
+            for key in sorted(self.symbol_keys, key=lambda x: int(x)):
                 idx = int(key)
                 
                 if key in self.symbol_names:
@@ -245,59 +322,56 @@ class ISOInstrumentsExtractor:
     
     def check_conversion_tool(self):
         """Check if conversion tool is available"""
+        # The probe result doesn't change during a run
+        if self._tool is not None:
+            return self._tool
+        
         try:
             # Try to import cairosvg
             import cairosvg
-            return 'cairosvg'
+            self._tool = 'cairosvg'
         except ImportError:
-            # Check if rsvg-convert is available
-            try:
-                result = subprocess.run(['which', 'rsvg-convert'], 
-                                      capture_output=True, text=True)
-                if result.returncode == 0:
-                    return 'rsvg-convert'
-            except:
-                pass
-            
-            # Check if inkscape is available
-            try:
-                result = subprocess.run(['which', 'inkscape'], 
-                                      capture_output=True, text=True)
-                if result.returncode == 0:
-                    return 'inkscape'
-            except:
-                pass
+            # Check if rsvg-convert or inkscape is on PATH
+            self._tool = next((tool for tool in ('rsvg-convert', 'inkscape') if shutil.which(tool)), None)
         
-        return None
+        return self._tool
     
     def convert_svg_to_png(self, svg_path, png_path, size=256, tool=None):
-        """Convert a single SVG file to PNG"""
+        """Convert a single SVG file to PNG with cairosvg or rsvg-convert"""
+        return _convert_svg_to_png(svg_path, png_path, size, tool)
+    
+    def convert_with_inkscape_shell(self, jobs, size=256):
+        """Convert (svg_path, png_path) pairs through a single Inkscape shell session"""
+        commands = ''.join(
+            f"file-open:{svg_path}; export-filename:{png_path}; "
+            f"export-width:{size}; export-height:{size}; export-do; file-close\n"
+            for svg_path, png_path in jobs
+        )
+        
+        # PNGs from earlier runs may already be there, so only count files
+        # this session actually (re)writes
+        before = {png_path: _mtime_ns(png_path) for _, png_path in jobs}
         try:
-            if tool == 'cairosvg':
-                import cairosvg
-                cairosvg.svg2png(url=svg_path, write_to=png_path, 
-                               output_width=size, output_height=size)
-                return True
-            
-            elif tool == 'rsvg-convert':
-                subprocess.run([
-                    'rsvg-convert', svg_path, '-o', png_path,
-                    '-w', str(size), '-h', str(size)
-                ], check=True)
-                return True
-            
-            elif tool == 'inkscape':
-                subprocess.run([
-                    'inkscape', svg_path, '--export-filename', png_path,
-                    '--export-width', str(size), '--export-height', str(size)
-                ], check=True, capture_output=True)
-                return True
-                
+            result = subprocess.run(['inkscape', '--shell'], input=commands + 'quit\n',
+                                    text=True, capture_output=True)
         except Exception as e:
-            print(f"  ⚠️  Error converting {svg_path}: {e}")
-            return False
+            print(f"  ⚠️  Error running Inkscape shell: {e}")
+            return 0
         
-        return False
+        converted_count = 0
+        for png_path, mtime in before.items():
+            new_mtime = _mtime_ns(png_path)
+            if new_mtime is not None and new_mtime != mtime:
+                converted_count += 1
+        
+        if result.returncode != 0 or converted_count < len(jobs):
+            print(f"  ⚠️  Inkscape shell exited with code {result.returncode}; "
+                  f"{len(jobs) - converted_count} of {len(jobs)} files were not converted")
+            # Inkscape is chatty, the last lines carry the actual error
+            for line in result.stderr.strip().splitlines()[-10:]:
+                print(f"     {line}")
+        
+        return converted_count
     
     def convert_to_png(self, png_size=256):
         """Convert all SVG files to PNG format"""
@@ -326,17 +400,30 @@ class ISOInstrumentsExtractor:
             print("   No SVG files found to convert")
             return 0
         
-        converted_count = 0
-        for svg_file in svg_files:
-            svg_path = os.path.join(self.output_dir, svg_file)
-            png_file = svg_file.replace('.svg', '.png')
-            png_path = os.path.join(png_dir, png_file)
-            
-            # Convert
-            if self.convert_svg_to_png(svg_path, png_path, png_size, tool):
-                converted_count += 1
-                if converted_count % 5 == 0:
-                    print(f"   Converted {converted_count}/{len(svg_files)} files...")
+        jobs = [(os.path.join(self.output_dir, svg_file),
+                 os.path.join(png_dir, svg_file.replace('.svg', '.png')))
+                for svg_file in svg_files]
+        
+        if tool == 'inkscape':
+            # Inkscape startup dominates per-file cost, so drive one shell session
+            converted_count = self.convert_with_inkscape_shell(jobs, png_size)
+        else:
+            # Conversions are independent; rsvg-convert spends its time in a
+            # subprocess, but cairosvg holds the GIL so it gets separate processes
+            workers = os.cpu_count() or 1
+            pool_class = ProcessPoolExecutor if tool == 'cairosvg' else ThreadPoolExecutor
+            converted_count = 0
+            with pool_class(max_workers=workers) as executor:
+                # Submit the module-level function so process workers only
+                # receive the paths, not a pickled copy of the extractor
+                futures = [executor.submit(_convert_svg_to_png, svg_path, png_path, png_size, tool)
+                           for svg_path, png_path in jobs]
+                
+                for future in as_completed(futures):
+                    if future.result():
+                        converted_count += 1
+                        if converted_count % 5 == 0:
+                            print(f"   Converted {converted_count}/{len(svg_files)} files...")
         
         print(f"\n✅ Successfully converted {converted_count} PNG files to {png_dir}/")
         return converted_count
@@ -348,26 +435,18 @@ class ISOInstrumentsExtractor:
         print("=" * 70)
         
         # Count categories
-        categories = {}
-        for name in self.symbol_names.values():
-            if ' - ' in name:
-                category = name.split(' - ')[0]
-            else:
-                category = name.split()[0] if name else 'Other'
-            categories[category] = categories.get(category, 0) + 1
+        categories = Counter(
+            name.split(' - ', 1)[0] if ' - ' in name else (name.split(None, 1)[0] if name else 'Other')
+            for name in self.symbol_names.values()
+        )
         
         print("\nSymbol Categories:")
         for category, count in sorted(categories.items()):
             print(f"  {category:30s}: {count:3d} symbols")
         
-        # Analyze red markers (connection points)
-        red_marker_count = 0
-        for svg_content in self.symbol_data.values():
-            if 'stroke="#ff0000"' in svg_content:
-                red_marker_count += 1
-        
+        # Red markers (connection points) are counted during extraction
         print(f"\nConnection Points:")
-        print(f"  {red_marker_count} symbols have red connection markers")
+        print(f"  {self.red_marker_count} symbols have red connection markers")
         print(f"  These indicate where process lines connect to instruments")
         
         # Identify common instrument types
@@ -420,6 +499,40 @@ class ISOInstrumentsExtractor:
         return True
 
 
+def _convert_svg_to_png(svg_path, png_path, size, tool):
+    """Convert a single SVG file to PNG (may run in a worker process)
+    
+    Inkscape is driven through convert_with_inkscape_shell instead.
+    """
+    try:
+        if tool == 'cairosvg':
+            import cairosvg
+            cairosvg.svg2png(url=svg_path, write_to=png_path, 
+                           output_width=size, output_height=size)
+            return True
+        
+        elif tool == 'rsvg-convert':
+            subprocess.run([
+                'rsvg-convert', svg_path, '-o', png_path,
+                '-w', str(size), '-h', str(size)
+            ], check=True)
+            return True
+            
+    except Exception as e:
+        print(f"  ⚠️  Error converting {svg_path}: {e}")
+        return False
+    
+    return False
+
+
+def _mtime_ns(path):
+    """Modification time of path in nanoseconds, or None if it doesn't exist"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
 def main():
     """Main function with command-line interface"""
     parser = argparse.ArgumentParser(
@@ -5,94 +5,185 @@ Extracts P&ID pipes and signal lines symbols from JSON to individual SVG files w
 Optionally converts SVG files to PNG format
 """
 
-import json
+import functools
+import itertools
 import os
 import re
 import shutil
 import argparse
+import csv
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from pathlib import Path
 import subprocess
 import sys
 
+try:
+    # Optional: orjson parses the string-heavy symbol JSON much faster
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+try:
+    # Optional: stream symbols from the JSON instead of loading it whole
+    import ijson
+except ImportError:
+    ijson = None
+
+# Non-standard v: attributes (v:unit, v:flip, v:layer, etc.)
+_V_ATTR_RE = re.compile(r'\s+v:\w+="[^"]*"')
+
+# Filename cleanup: drop special characters, then collapse separators
+_NONWORD_RE = re.compile(r'[^\w\s-]')
+_SEP_RE = re.compile(r'[-\s]+')
+
+# Symbol boundaries and titles in the original combined SVG
+_VIEWBOX = '<svg viewBox'
+_TITLE_RE = re.compile(r'<title>([^<]+)</title>')
+
+# Opening tags of shape elements that get stroke/fill fixes in clean_svg_content
+_SHAPE_RE = re.compile(r'<(path|rect|circle|ellipse|polygon|polyline|line)\b[^>]*>')
+
+# name="value" / name='value' attribute pairs inside a shape tag
+_ATTR_RE = re.compile(r'([\w:.-]+)=(?:"([^"]*)"|\'([^\']*)\')')
+
+
+def _fix_shape(match):
+    """Add stroke color and appropriate fill to a single shape tag"""
+    tag_text = match.group(0)
+    tag = match.group(1)
+    
+    # Parse the attributes once so each check below is a dict lookup
+    end = len(tag) + 1
+    attrs = {name: dq or sq for name, dq, sq in _ATTR_RE.findall(tag_text, end)}
+    
+    # For lines and signals, we typically don't want fills
+    # Add stroke color if missing but has stroke-width
+    if 'stroke-width' in attrs and 'stroke' not in attrs:
+        tag_text = tag_text.replace('stroke-width=', 'stroke="#000000" stroke-width=')
+        attrs['stroke'] = '#000000'
+    
+    if 'fill' in attrs:
+        return tag_text
+    
+    if 'stroke' in attrs:
+        # Most line symbols should have no fill
+        fill = 'none'
+    elif (tag == 'polygon' or (tag == 'path' and 'Z' in attrs.get('d', ''))) and \
+            any(name.startswith('marker-') for name in attrs):
+        # Special handling for markers and arrows: closed arrowheads need a fill
+        fill = '#000000'
+    else:
+        return tag_text
+    return f'{tag_text[:end]} fill="{fill}"{tag_text[end:]}'
+
+
+def _classify(name):
+    """Return (category, group) for a name
+    
+    category is the CSV column: the part before ' - ', else the first word.
+    group is used by the analysis report, which also keeps '... Line' names
+    together.
+    """
+    # partition finds the separator and slices in one scan
+    prefix, sep, _ = name.partition(' - ')
+    if sep:
+        return prefix, prefix
+    
+    category = name.split()[0] if name else 'Other'
+    prefix, sep, _ = name.partition(' Line')
+    if sep:
+        return category, prefix + ' Line'
+    return category, category
+
 
 class ISOPipesAndSignalLinesExtractor:
+    # Define pipes and signal lines symbol names based on common P&ID line types
+    # These are organized by typical line types and signal representations
+    PREDEFINED_NAMES = {
+        "0": "Process Line - Solid",
+        "1": "Process Line - Heavy",
+        "2": "Process Line - Medium",
+        "3": "Process Line - Light",
+        "4": "Utility Line - Air",
+        "5": "Utility Line - Water",
+        "6": "Utility Line - Steam",
+        "7": "Utility Line - Gas",
+        "8": "Electrical Signal - Basic",
+        "9": "Electrical Signal - Power",
+        "10": "Pneumatic Signal",
+        "11": "Hydraulic Signal",
+        "12": "Capillary Tube",
+        "13": "Process Line - Insulated",
+        "14": "Process Line - Traced",
+        "15": "Process Line - Jacketed",
+        "16": "Underground Line",
+        "17": "Process Line - Future",
+        "18": "Process Line - Existing",
+        "19": "Software Link",
+        "20": "Mechanical Link",
+        "21": "Process Connection - Socket Weld",
+        "22": "Process Connection - Screwed",
+        "23": "Process Connection - Flanged",
+        "24": "Process Connection - Soldered",
+        "25": "Line Crossing - No Connection",
+        "26": "Line Crossing - Connected",
+        "27": "Flow Direction - Right",
+        "28": "Flow Direction - Left",
+        "29": "Flow Direction - Up",
+        "30": "Flow Direction - Down",
+        "31": "Flow Direction - Bidirectional",
+        "32": "Signal Line - Dashed",
+        "33": "Signal Line - Dotted",
+        "34": "Signal Line - Chain",
+        "35": "Signal Line - Double",
+        "36": "Process Line - Primary",
+        "37": "Process Line - Secondary",
+        "38": "Process Line - Tertiary",
+        "39": "Instrument Air Line",
+        "40": "Nitrogen Line",
+        "41": "Vacuum Line",
+        "42": "Drain Line",
+        "43": "Vent Line",
+        "44": "Sample Line",
+        "45": "Process Line - Hazardous",
+        "46": "Process Line - Non-Hazardous",
+        "47": "Cooling Water Supply",
+        "48": "Cooling Water Return",
+        "49": "Steam Supply",
+        "50": "Steam Condensate",
+        "51": "Fire Protection Line",
+        "52": "Process Line - Sloped",
+        "53": "Process Line - Vertical",
+        "54": "Process Line - Horizontal",
+        "55": "Signal Line - Binary",
+        "56": "Signal Line - Analog",
+        "57": "Signal Line - Digital"
+    }
+    
     def __init__(self, json_file='pid-iso-pipes-and-signal-lines.json', svg_file='pid-iso-pipes-and-signal-lines.svg'):
         self.json_file = json_file
         self.svg_file = svg_file
         self.output_dir = 'svg'
         self.symbol_data = {}
+        self.symbol_keys = []
+        self.dash_count = 0
+        self.png_count = 0
         self.symbol_names = {}
+        self._categories = {}
+        self._tool = None
         
-        # Define pipes and signal lines symbol names based on common P&ID line types
-        # These are organized by typical line types and signal representations
-        self.predefined_names = {
-            "0": "Process Line - Solid",
-            "1": "Process Line - Heavy",
-            "2": "Process Line - Medium",
-            "3": "Process Line - Light",
-            "4": "Utility Line - Air",
-            "5": "Utility Line - Water",
-            "6": "Utility Line - Steam",
-            "7": "Utility Line - Gas",
-            "8": "Electrical Signal - Basic",
-            "9": "Electrical Signal - Power",
-            "10": "Pneumatic Signal",
-            "11": "Hydraulic Signal",
-            "12": "Capillary Tube",
-            "13": "Process Line - Insulated",
-            "14": "Process Line - Traced",
-            "15": "Process Line - Jacketed",
-            "16": "Underground Line",
-            "17": "Process Line - Future",
-            "18": "Process Line - Existing",
-            "19": "Software Link",
-            "20": "Mechanical Link",
-            "21": "Process Connection - Socket Weld",
-            "22": "Process Connection - Screwed",
-            "23": "Process Connection - Flanged",
-            "24": "Process Connection - Soldered",
-            "25": "Line Crossing - No Connection",
-            "26": "Line Crossing - Connected",
-            "27": "Flow Direction - Right",
-            "28": "Flow Direction - Left",
-            "29": "Flow Direction - Up",
-            "30": "Flow Direction - Down",
-            "31": "Flow Direction - Bidirectional",
-            "32": "Signal Line - Dashed",
-            "33": "Signal Line - Dotted",
-            "34": "Signal Line - Chain",
-            "35": "Signal Line - Double",
-            "36": "Process Line - Primary",
-            "37": "Process Line - Secondary",
-            "38": "Process Line - Tertiary",
-            "39": "Instrument Air Line",
-            "40": "Nitrogen Line",
-            "41": "Vacuum Line",
-            "42": "Drain Line",
-            "43": "Vent Line",
-            "44": "Sample Line",
-            "45": "Process Line - Hazardous",
-            "46": "Process Line - Non-Hazardous",
-            "47": "Cooling Water Supply",
-            "48": "Cooling Water Return",
-            "49": "Steam Supply",
-            "50": "Steam Condensate",
-            "51": "Fire Protection Line",
-            "52": "Process Line - Sloped",
-            "53": "Process Line - Vertical",
-            "54": "Process Line - Horizontal",
-            "55": "Signal Line - Binary",
-            "56": "Signal Line - Analog",
-            "57": "Signal Line - Digital"
-        }
-        
-    def clean_svg_content(self, svg_content):
+    @staticmethod
+    def clean_svg_content(svg_content):
         """Clean and fix SVG content to be valid"""
+        # Cheap substring checks skip each pass the symbol doesn't need
+        
         # Remove non-standard v: attributes (v:unit, v:flip, v:layer, etc.)
-        svg_content = re.sub(r'\s+v:\w+="[^"]*"', '', svg_content)
+        if 'v:' in svg_content:
+            svg_content = _V_ATTR_RE.sub('', svg_content)
         
         # Fix HTML entities in attributes
-        svg_content = svg_content.replace('&quot;', '"')
+        if '&quot;' in svg_content:
+            svg_content = svg_content.replace('&quot;', '"')
         
         # Add xmlns attribute if missing
         if 'xmlns=' not in svg_content:
@@ -102,42 +193,10 @@ class ISOPipesAndSignalLinesExtractor:
         if 'xlink:href' in svg_content and 'xmlns:xlink' not in svg_content:
             svg_content = svg_content.replace('<svg', '<svg xmlns:xlink="http://www.w3.org/1999/xlink"', 1)
         
-        # Fix shapes: add stroke color and appropriate fill for P&ID symbols
-        lines = svg_content.split('>')
-        fixed_lines = []
-        for line in lines:
-            # Handle paths, rects, circles, ellipses, polygons, polylines
-            shape_tags = ['<path', '<rect', '<circle', '<ellipse', '<polygon', '<polyline', '<line']
-            is_shape = any(tag in line for tag in shape_tags)
-            
-            if is_shape:
-                # For lines and signals, we typically don't want fills
-                # Add stroke color if missing but has stroke-width
-                if 'stroke-width=' in line and 'stroke=' not in line:
-                    # Check if it's a special color already
-                    if 'stroke="#ff0000"' not in line and 'stroke="#646464"' not in line:
-                        line = line.replace('stroke-width=', 'stroke="#000000" stroke-width=')
-                
-                # For pipes and signal lines: determine appropriate fill
-                if 'fill=' not in line and ('stroke=' in line or 'stroke-width=' in line):
-                    # Lines typically have no fill
-                    for tag in shape_tags:
-                        if tag in line:
-                            # Most line symbols should have no fill
-                            line = line.replace(tag, f'{tag} fill="none"')
-                            break
-                
-                # Special handling for markers and arrows
-                if '<marker' in line or 'marker-' in line:
-                    # Markers (arrowheads) might need fill
-                    if 'fill=' not in line and '<polygon' in line:
-                        line = line.replace('<polygon', '<polygon fill="#000000"')
-                    elif 'fill=' not in line and '<path' in line and 'Z' in line:
-                        # Closed paths in markers need fill
-                        line = line.replace('<path', '<path fill="#000000"')
-            
-            fixed_lines.append(line)
-        svg_content = '>'.join(fixed_lines)
+        # Fix shapes: add stroke color and appropriate fill for P&ID symbols;
+        # without any stroke or marker attribute there is nothing to fix
+        if 'stroke' in svg_content or 'marker-' in svg_content:
+            svg_content = _SHAPE_RE.sub(_fix_shape, svg_content)
         
         # Add XML declaration if missing
         if not svg_content.startswith('<?xml'):
@@ -147,43 +206,79 @@ class ISOPipesAndSignalLinesExtractor:
     
     def load_json_data(self):
         """Load symbol data from JSON file"""
+        if ijson is not None:
+            # Only the keys are collected here; symbols are parsed one at a
+            # time during extraction
+            print(f"Streaming JSON data from {self.json_file}...")
+            try:
+                with open(self.json_file, 'rb') as f:
+                    self.symbol_keys = [value for prefix, event, value in ijson.parse(f)
+                                        if prefix == '' and event == 'map_key']
+                print(f"✅ Loaded {len(self.symbol_keys)} symbols")
+                return True
+            except Exception as e:
+                print(f"❌ Error loading JSON: {e}")
+                return False
+        
         print(f"Loading JSON data from {self.json_file}...")
         try:
-            with open(self.json_file, 'r') as f:
-                self.symbol_data = json.load(f)
+            with open(self.json_file, 'rb') as f:
+                self.symbol_data = _json.loads(f.read())
+            self.symbol_keys = list(self.symbol_data)
             print(f"✅ Loaded {len(self.symbol_data)} symbols")
             return True
         except Exception as e:
             print(f"❌ Error loading JSON: {e}")
             return False
     
+    def iter_symbols(self):
+        """Yield (key, svg_content) pairs, streaming from disk when ijson is available"""
+        if ijson is None:
+            yield from self.symbol_data.items()
+            return
+        
+        with open(self.json_file, 'rb') as f:
+            yield from ijson.kvitems(f, '')
+    
     def extract_symbol_names(self):
         """Extract symbol names from the original SVG file or use predefined names"""
         print(f"\nSetting up symbol names...")
         
         # Use predefined names
-        self.symbol_names = self.predefined_names.copy()
+        self.symbol_names = self.PREDEFINED_NAMES.copy()
         
         # Try to extract additional names from SVG if available
         try:
+            # Titles only ever fill gaps, so skip reading the SVG when there are none
+            if all(str(i) in self.symbol_names for i in range(len(self.symbol_keys))):
+                print(f"✅ Set up {len(self.symbol_names)} symbol names")
+                return True
+            
             with open(self.svg_file, 'r') as f:
                 content = f.read()
             
-            # Split by viewBox to find individual symbols
-            symbols = re.split(r'<svg viewBox', content)[1:]  # Skip the first part
+            # Record where each symbol section starts instead of splitting
+            # the whole file into copies
+            offsets = []
+            pos = content.find(_VIEWBOX)
+            while pos != -1:
+                offsets.append(pos)
+                pos = content.find(_VIEWBOX, pos + len(_VIEWBOX))
+            ends = offsets[1:] + [len(content)]
             
-            # Extract titles for each symbol section
-            for i, symbol in enumerate(symbols):
+            # Extract titles for the symbol sections that still need a name
+            for i, (start, end) in enumerate(zip(offsets, ends)):
+                # Only update if we don't have a predefined name
+                if str(i) in self.symbol_names:
+                    continue
+                
                 # Find the first title in this symbol section
-                title_match = re.search(r'<title>([^<]+)</title>', symbol)
+                title_match = _TITLE_RE.search(content, start + len(_VIEWBOX), end)
                 if title_match:
-                    title = title_match.group(1)
-                    # Only update if we don't have a predefined name
-                    if str(i) not in self.symbol_names:
-                        self.symbol_names[str(i)] = title
+                    self.symbol_names[str(i)] = title_match.group(1)
             
             # Ensure all symbols have names
-            for i in range(len(self.symbol_data)):
+            for i in range(len(self.symbol_keys)):
                 if str(i) not in self.symbol_names:
                     # Generate generic name based on index
                     if i < 20:
@@ -199,51 +294,72 @@ class ISOPipesAndSignalLinesExtractor:
             print(f"⚠️  Warning: Could not extract names from SVG: {e}")
             print(f"   Using {len(self.symbol_names)} predefined names")
             # Fill in remaining names
-            for i in range(len(self.symbol_data)):
+            for i in range(len(self.symbol_keys)):
                 if str(i) not in self.symbol_names:
                     self.symbol_names[str(i)] = f"Line Symbol {i}"
             return len(self.symbol_names) > 0
+        finally:
+            # Classify every name once for the CSV and the analysis report
+            self._categories = {key: _classify(name) for key, name in self.symbol_names.items()}
     
-    def clean_filename(self, name):
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def clean_filename(name):
         """Clean symbol name for use as filename"""
         # Remove special characters and convert to lowercase with underscores
-        name = re.sub(r'[^\w\s-]', '', name)
-        name = re.sub(r'[-\s]+', '_', name)
+        name = _NONWORD_RE.sub('', name)
+        name = _SEP_RE.sub('_', name)
         return name.lower()
     
-    def extract_symbols(self, use_names=True):
-        """Extract symbols from JSON to individual SVG files"""
+    def extract_symbols(self, use_names=True, png_size=None):
+        """Extract symbols from JSON to individual SVG files
+        
+        With png_size set, each worker also renders its symbol to png/ with
+        cairosvg straight from the cleaned bytes; the number of PNGs written
+        is left in self.png_count.
+        """
         # Create output directory
         os.makedirs(self.output_dir, exist_ok=True)
+        png_prefix = None
+        if png_size is not None:
+            os.makedirs('png', exist_ok=True)
+            png_prefix = 'png' + os.sep
         
         print(f"\nExtracting symbols to {self.output_dir}/...")
         
+        # Cleanup is CPU-bound regex work and symbols are independent, so
+        # clean and write them in worker processes; map keeps index order.
+        # Symbols are handed over in bounded batches so a streamed JSON is
+        # never held in memory all at once.
+        symbols = self.iter_symbols()
+        batch_size = 64 * (os.cpu_count() or 1)
         extracted_count = 0
-        for key, svg_content in self.symbol_data.items():
-            idx = int(key)
-            
-            # Clean and fix SVG content
-            clean_svg = self.clean_svg_content(svg_content)
-            
-            # Create filename
-            if use_names and key in self.symbol_names:
-                clean_name = self.clean_filename(self.symbol_names[key])
-                filename = f"pid_iso_pipes_signal_{idx:03d}_{clean_name}.svg"
-            else:
-                filename = f"pid_iso_pipes_signal_{idx:03d}.svg"
-            
-            filepath = os.path.join(self.output_dir, filename)
-            
-            # Write to file
-            with open(filepath, 'w') as f:
-                f.write(clean_svg)
-            
-            if use_names and key in self.symbol_names:
-                print(f"  {idx:03d}: {filename} ({self.symbol_names[key]})")
-            else:
-                print(f"  {idx:03d}: {filename}")
-            
-            extracted_count += 1
+        self.dash_count = 0
+        self.png_count = 0
+        # output_dir is fixed for the whole run, so join paths by concatenation
+        out_prefix = self.output_dir + os.sep
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            while batch := list(itertools.islice(symbols, batch_size)):
+                keys = [key for key, _ in batch]
+                names = [self.symbol_names.get(key) if use_names else None for key in keys]
+                results = executor.map(_clean_and_write, keys, [svg for _, svg in batch], names,
+                                       itertools.repeat(out_prefix), itertools.repeat(png_prefix),
+                                       itertools.repeat(png_size), chunksize=8)
+                for (idx, filename, has_dash, png_error), name in zip(results, names):
+                    # Keep the line-style tally for the analysis rather than the SVG bodies
+                    self.dash_count += has_dash
+                    
+                    if name is not None:
+                        print(f"  {idx:03d}: {filename} ({name})")
+                    else:
+                        print(f"  {idx:03d}: {filename}")
+                    
+                    if png_error is not None:
+                        print(f"  ⚠️  Error converting {out_prefix + filename}: {png_error}")
+                    elif png_prefix is not None:
+                        self.png_count += 1
+                    
+                    extracted_count += 1
         
         print(f"\n✅ Successfully extracted {extracted_count} symbols")
         return extracted_count
@@ -253,64 +369,59 @@ class ISOPipesAndSignalLinesExtractor:
         csv_path = 'pipes_signal_lines_reference.csv'
         print(f"\nCreating reference file: {csv_path}")
         
-        with open(csv_path, 'w') as f:
-            f.write("Index,Filename,Description,Category\n")
-            for key in sorted(self.symbol_data.keys(), key=lambda x: int(x)):
-                idx = int(key)
-                
-                if key in self.symbol_names:
-                    name = self.symbol_names[key]
-                    clean_name = self.clean_filename(name)
-                    filename = f"pid_iso_pipes_signal_{idx:03d}_{clean_name}.svg"
-                    
-                    # Extract category from name
-                    if ' - ' in name:
-                        category = name.split(' - ')[0]
-                    else:
-                        category = name.split()[0] if name else 'Other'
-                else:
-                    name = f"Line Symbol {idx}"
-                    filename = f"pid_iso_pipes_signal_{idx:03d}.svg"
-                    category = 'Unknown'
-                
-                f.write(f"{idx},{filename},{name},{category}\n")
+        rows = []
+        for key in sorted(self.symbol_keys, key=int):
+            idx = int(key)
+            
+            if key in self.symbol_names:
+                name = self.symbol_names[key]
+                clean_name = self.clean_filename(name)
+                filename = f"pid_iso_pipes_signal_{idx:03d}_{clean_name}.svg"
+                category = self._categories[key][0]
+            else:
+                name = f"Line Symbol {idx}"
+                filename = f"pid_iso_pipes_signal_{idx:03d}.svg"
+                category = 'Unknown'
+            
+            rows.append((idx, filename, name, category))
+        
+        # csv.writer buffers the rows and quotes names that contain commas
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(['Index', 'Filename', 'Description', 'Category'])
+            writer.writerows(rows)
         
         print(f"✅ Created {csv_path}")
     
     def check_conversion_tool(self):
         """Check if conversion tool is available"""
+        # The probe result doesn't change during a run
+        if self._tool is not None:
+            return self._tool
+        
         try:
             # Try to import cairosvg
             import cairosvg
-            return 'cairosvg'
+            self._tool = 'cairosvg'
         except ImportError:
-            # Check if rsvg-convert is available
-            try:
-                result = subprocess.run(['which', 'rsvg-convert'], 
-                                      capture_output=True, text=True)
-                if result.returncode == 0:
-                    return 'rsvg-convert'
-            except:
-                pass
-            
-            # Check if inkscape is available
-            try:
-                result = subprocess.run(['which', 'inkscape'], 
-                                      capture_output=True, text=True)
-                if result.returncode == 0:
-                    return 'inkscape'
-            except:
-                pass
+            # Check if rsvg-convert or inkscape is on PATH
+            self._tool = next((tool for tool in ('rsvg-convert', 'inkscape') if shutil.which(tool)), None)
         
-        return None
+        return self._tool
     
-    def convert_svg_to_png(self, svg_path, png_path, size=256, tool=None):
-        """Convert a single SVG file to PNG"""
+    def convert_svg_to_png(self, svg_path, png_path, size=256, tool=None, cairosvg_module=None):
+        """Convert a single SVG file to PNG
+        
+        cairosvg_module lets batch callers pass in an already imported cairosvg.
+        """
         try:
             if tool == 'cairosvg':
-                import cairosvg
-                cairosvg.svg2png(url=svg_path, write_to=png_path, 
-                               output_width=size, output_height=size)
+                if cairosvg_module is None:
+                    import cairosvg as cairosvg_module
+                # Hand cairosvg the bytes directly rather than going through its URL loader
+                with open(svg_path, 'rb') as f:
+                    cairosvg_module.svg2png(bytestring=f.read(), write_to=png_path,
+                                            output_width=size, output_height=size)
                 return True
             
             elif tool == 'rsvg-convert':
@@ -333,6 +444,39 @@ class ISOPipesAndSignalLinesExtractor:
         
         return False
     
+    def convert_with_inkscape_shell(self, jobs, size=256):
+        """Convert (svg_path, png_path) pairs through a single Inkscape shell session"""
+        commands = ''.join(
+            f"file-open:{svg_path}; export-filename:{png_path}; "
+            f"export-width:{size}; export-height:{size}; export-do; file-close\n"
+            for svg_path, png_path in jobs
+        )
+        
+        # PNGs from earlier runs may already be there, so only count files
+        # this session actually (re)writes
+        before = {png_path: _mtime_ns(png_path) for _, png_path in jobs}
+        try:
+            result = subprocess.run(['inkscape', '--shell'], input=commands + 'quit\n',
+                                    text=True, capture_output=True)
+        except Exception as e:
+            print(f"  ⚠️  Error running Inkscape shell: {e}")
+            return 0
+        
+        converted_count = 0
+        for png_path, mtime in before.items():
+            new_mtime = _mtime_ns(png_path)
+            if new_mtime is not None and new_mtime != mtime:
+                converted_count += 1
+        
+        if result.returncode != 0 or converted_count < len(jobs):
+            print(f"  ⚠️  Inkscape shell exited with code {result.returncode}; "
+                  f"{len(jobs) - converted_count} of {len(jobs)} files were not converted")
+            # Inkscape is chatty, the last lines carry the actual error
+            for line in result.stderr.strip().splitlines()[-10:]:
+                print(f"     {line}")
+        
+        return converted_count
+    
     def convert_to_png(self, png_size=256):
         """Convert all SVG files to PNG format"""
         # Check for conversion tool
@@ -360,17 +504,34 @@ class ISOPipesAndSignalLinesExtractor:
             print("   No SVG files found to convert")
             return 0
         
-        converted_count = 0
-        for svg_file in svg_files:
-            svg_path = os.path.join(self.output_dir, svg_file)
-            png_file = svg_file.replace('.svg', '.png')
-            png_path = os.path.join(png_dir, png_file)
+        svg_prefix = self.output_dir + os.sep
+        png_prefix = png_dir + os.sep
+        jobs = [(svg_prefix + svg_file, png_prefix + svg_file.replace('.svg', '.png'))
+                for svg_file in svg_files]
+        
+        if tool == 'inkscape':
+            # Inkscape startup dominates per-file cost, so drive one shell session
+            converted_count = self.convert_with_inkscape_shell(jobs, png_size)
+        else:
+            # Conversions are independent and mostly wait on rsvg-convert (or
+            # cairosvg's C renderer), so run them on a thread pool
+            converted_count = 0
             
-            # Convert
-            if self.convert_svg_to_png(svg_path, png_path, png_size, tool):
-                converted_count += 1
-                if converted_count % 10 == 0:
-                    print(f"   Converted {converted_count}/{len(svg_files)} files...")
+            # Import cairosvg once for every worker instead of per file
+            cairosvg_module = None
+            if tool == 'cairosvg':
+                import cairosvg as cairosvg_module
+            
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                futures = [executor.submit(self.convert_svg_to_png, svg_path, png_path, png_size,
+                                           tool, cairosvg_module)
+                           for svg_path, png_path in jobs]
+                
+                for future in as_completed(futures):
+                    if future.result():
+                        converted_count += 1
+                        if converted_count % 10 == 0:
+                            print(f"   Converted {converted_count}/{len(svg_files)} files...")
         
         print(f"\n✅ Successfully converted {converted_count} PNG files to {png_dir}/")
         return converted_count
@@ -383,14 +544,8 @@ class ISOPipesAndSignalLinesExtractor:
         
         # Count categories
         categories = {}
-        for name in self.symbol_names.values():
-            if ' - ' in name:
-                category = name.split(' - ')[0]
-            elif ' Line' in name:
-                category = name.split(' Line')[0] + ' Line'
-            else:
-                category = name.split()[0] if name else 'Other'
-            categories[category] = categories.get(category, 0) + 1
+        for _, group in self._categories.values():
+            categories[group] = categories.get(group, 0) + 1
         
         print("\nSymbol Categories:")
         for category, count in sorted(categories.items()):
@@ -403,15 +558,12 @@ class ISOPipesAndSignalLinesExtractor:
         print("  • Special Lines (insulated, traced, jacketed)")
         print("  • Flow Directions and Connections")
         
-        # Count different line styles
-        dash_count = 0
-        for svg_content in self.symbol_data.values():
-            if 'stroke-dasharray' in svg_content:
-                dash_count += 1
+        # Line styles are tallied during extraction
+        dash_count = self.dash_count
         
         print(f"\nLine Styles:")
         print(f"  {dash_count} symbols use dashed/dotted patterns")
-        print(f"  {len(self.symbol_data) - dash_count} symbols use solid lines")
+        print(f"  {len(self.symbol_keys) - dash_count} symbols use solid lines")
         
         print("\n" + "=" * 70)
     
@@ -429,8 +581,12 @@ class ISOPipesAndSignalLinesExtractor:
         # Set up symbol names
         has_names = self.extract_symbol_names() if extract_names else False
         
+        # cairosvg renders from memory, so fuse it into extraction instead of
+        # re-reading every SVG afterwards; other tools work from the files
+        fuse_png = convert_png and self.check_conversion_tool() == 'cairosvg'
+        
         # Extract symbols
-        count = self.extract_symbols(use_names=has_names)
+        count = self.extract_symbols(use_names=has_names, png_size=png_size if fuse_png else None)
         
         # Create reference CSV
         if create_csv and has_names:
@@ -442,7 +598,12 @@ class ISOPipesAndSignalLinesExtractor:
         
         # Convert to PNG if requested
         png_count = 0
-        if convert_png:
+        if fuse_png:
+            png_count = self.png_count
+            print(f"\n🎨 Converted SVG to PNG using cairosvg during extraction")
+            print(f"   Size: {png_size}x{png_size} pixels")
+            print(f"\n✅ Successfully converted {png_count} PNG files to png/")
+        elif convert_png:
             png_count = self.convert_to_png(png_size)
         
         print("\n✨ Extraction complete!")
@@ -455,6 +616,55 @@ class ISOPipesAndSignalLinesExtractor:
         return True
 
 
+def _clean_and_write(key, svg_content, name, out_prefix, png_prefix=None, png_size=256):
+    """Clean a single symbol and write it under out_prefix (runs in a worker process)
+    
+    With png_prefix set, the cleaned bytes are also rendered to a PNG there
+    with cairosvg. Returns (idx, filename, has_dash, png_error), where
+    has_dash tells whether the source symbol uses stroke-dasharray and
+    png_error is the rendering error, if any.
+    """
+    idx = int(key)
+    
+    # Clean and fix SVG content
+    clean_svg = ISOPipesAndSignalLinesExtractor.clean_svg_content(svg_content).encode('utf-8')
+    
+    # Create filename
+    if name is not None:
+        clean_name = ISOPipesAndSignalLinesExtractor.clean_filename(name)
+        filename = f"pid_iso_pipes_signal_{idx:03d}_{clean_name}.svg"
+    else:
+        filename = f"pid_iso_pipes_signal_{idx:03d}.svg"
+    
+    # Write to file, skipping the buffered text file layer for this single write
+    data = memoryview(clean_svg)
+    fd = os.open(out_prefix + filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+    
+    png_error = None
+    if png_prefix is not None:
+        try:
+            import cairosvg
+            cairosvg.svg2png(bytestring=clean_svg, write_to=png_prefix + filename[:-4] + '.png',
+                             output_width=png_size, output_height=png_size)
+        except Exception as e:
+            png_error = str(e)
+    
+    return idx, filename, 'stroke-dasharray' in svg_content, png_error
+
+
+def _mtime_ns(path):
+    """Modification time of path in nanoseconds, or None if it doesn't exist"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
 def main():
     """Main function with command-line interface"""
     parser = argparse.ArgumentParser(
@@ -3,172 +3,261 @@
 ISO Valves Symbol Extractor
 Extracts P&ID valves symbols from JSON to individual SVG files with proper names
 Optionally converts SVG files to PNG format
+
+The cleanup hot path (_fix_shape, clean_svg_body, _process_one) is fully
+type-annotated so the module can be compiled with mypyc
+(`mypyc extract_iso_valves_symbols.py`). Running this file directly always
+uses the pure-Python source; run `python run_extract_iso_valves_symbols.py`
+(same arguments) to go through the compiled extension when one has been
+built next to it.
 """
 
-import json
+from __future__ import annotations
+
 import os
 import re
 import shutil
+import string
 import argparse
+from collections import Counter
+import csv
+import io
+import itertools
+import mmap
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from pathlib import Path
 import subprocess
 import sys
 
+try:
+    # Optional: C-backed JSON parsers, falling back to the stdlib
+    import orjson as _json
+except ImportError:
+    try:
+        import ujson as _json  # type: ignore
+    except ImportError:
+        import json as _json  # type: ignore
+
+try:
+    # Optional: stream symbols from the JSON instead of loading it whole
+    import ijson  # type: ignore
+except ImportError:
+    ijson = None
+
+
+# Non-standard v: attributes (v:unit, v:flip, v:layer, etc.)
+_V_ATTR_RE = re.compile(rb'\s+v:\w+="[^"]*"')
+
+# Drops punctuation (except '_') and turns '-' into a separator for clean_filename
+_FILENAME_TRANS = str.maketrans({c: None for c in string.punctuation if c not in '-_'} | {'-': ' '})
+
+# Symbol boundaries and titles in the original combined SVG, matched in one
+# scan; group 1 is only set for titles
+_SYMBOL_TITLE_RE = re.compile(rb'<svg viewBox|<title>([^<]+)</title>')
+
+# Prepended to every extracted symbol that lacks one
+_XML_DECL = b'<?xml version="1.0" encoding="UTF-8"?>\n'
+
+# Shape elements that get stroke/fill fixes in clean_svg_content
+_SHAPE_TAGS = (b'path', b'rect', b'circle', b'ellipse', b'polygon', b'polyline', b'line')
+_SHAPE_RE = re.compile(rb'<(%s)\b([^>]*)>' % b'|'.join(_SHAPE_TAGS))
+
+# Fill per shape tag: polygons are usually valve bodies, circles and
+# rectangles actuators or frames; lines have no fill. Paths depend on
+# whether they are closed, see _path_fill.
+_TAG_FILLS = {
+    b'polygon': b'white',
+    b'circle': b'white',
+    b'ellipse': b'white',
+    b'rect': b'white',
+    b'polyline': b'none',
+    b'line': b'none',
+}
+
+
+def _path_fill(attrs: bytes) -> bytes:
+    """Closed paths are valve bodies and get a white fill, open paths are just lines"""
+    return b'white' if b'Z' in attrs or b'z' in attrs else b'none'
+
+
+def _fix_shape(match: re.Match[bytes]) -> bytes:
+    """Add stroke color and appropriate fill to a single shape tag"""
+    tag, attrs = match.groups()
+    
+    # Add stroke color if missing but has stroke-width
+    if b'stroke-width=' in attrs and b'stroke=' not in attrs:
+        attrs = attrs.replace(b'stroke-width=', b'stroke="#000000" stroke-width=')
+    
+    # For valves: determine appropriate fill
+    if b'fill=' in attrs or (b'stroke=' not in attrs and b'stroke-width=' not in attrs):
+        return b'<%s%s>' % (tag, attrs)
+    
+    if b'stroke="#ff0000"' in attrs:
+        # Red markers (connection points) should have no fill
+        fill = b'none'
+    elif tag == b'path':
+        fill = _path_fill(attrs)
+    else:
+        fill = _TAG_FILLS[tag]
+    return b'<%s fill="%s"%s>' % (tag, fill, attrs)
+
+
+# Category rules checked in order against a symbol name; first match wins
+_CATEGORY_RULES = (
+    ('Control', 'Control Valve'),
+    ('Check', 'Check Valve'),
+    ('Safety', 'Safety/Relief Valve'),
+    ('Relief', 'Safety/Relief Valve'),
+    ('Three-Way', 'Multi-Way Valve'),
+    ('Four-Way', 'Multi-Way Valve'),
+)
+
+
+# Name fragments that mark a valve as actuated in analyze_symbols
+_ACTUATORS = ('Pneumatic', 'Electric', 'Hydraulic', 'Solenoid')
+
+
+def _classify(name):
+    """Return the special valve category for a name, or None for standard valves"""
+    for substr, category in _CATEGORY_RULES:
+        if substr in name:
+            return category
+    return None
+
 
 class ISOValvesExtractor:
+    # Define valves symbol names based on common P&ID valve types
+    PREDEFINED_NAMES = {
+        "0": "Gate Valve",
+        "1": "Globe Valve",
+        "2": "Ball Valve",
+        "3": "Butterfly Valve",
+        "4": "Check Valve",
+        "5": "Check Valve - Spring Loaded",
+        "6": "Plug Valve",
+        "7": "Diaphragm Valve",
+        "8": "Needle Valve",
+        "9": "Angle Valve",
+        "10": "Three-Way Valve",
+        "11": "Four-Way Valve",
+        "12": "Relief Valve",
+        "13": "Safety Valve",
+        "14": "Pressure Reducing Valve",
+        "15": "Control Valve",
+        "16": "Control Valve - Pneumatic",
+        "17": "Control Valve - Electric",
+        "18": "Control Valve - Hydraulic",
+        "19": "Solenoid Valve",
+        "20": "Float Valve",
+        "21": "Knife Gate Valve",
+        "22": "Pinch Valve",
+        "23": "Rotary Valve"
+    }
+    
     def __init__(self, json_file='pid-iso-valves.json', svg_file='pid-iso-valves.svg'):
         self.json_file = json_file
         self.svg_file = svg_file
         self.output_dir = 'svg'
+        self.quiet = False
+        self._tool = None
         self.symbol_data = {}
+        self.symbol_keys = []
         self.symbol_names = {}
+        self._categories = {}
+        
+    @staticmethod
+    def clean_svg_content(svg_content: bytes) -> bytes:
+        """Clean and fix SVG content (UTF-8 bytes) to be valid"""
+        svg_content = ISOValvesExtractor.clean_svg_body(svg_content)
+        
+        # Add XML declaration if missing
+        if not svg_content.startswith(b'<?xml'):
+            svg_content = _XML_DECL + svg_content
+        
+        return svg_content
+    
+    @staticmethod
+    def clean_svg_body(svg_content: bytes) -> bytes:
+        """Clean and fix SVG content (UTF-8 bytes), leaving the XML declaration to the caller"""
+        # Cheap substring checks skip each pass the symbol doesn't need
         
-        # Define valves symbol names based on common P&ID valve types
-        self.predefined_names = {
-            "0": "Gate Valve",
-            "1": "Globe Valve",
-            "2": "Ball Valve",
-            "3": "Butterfly Valve",
-            "4": "Check Valve",
-            "5": "Check Valve - Spring Loaded",
-            "6": "Plug Valve",
-            "7": "Diaphragm Valve",
-            "8": "Needle Valve",
-            "9": "Angle Valve",
-            "10": "Three-Way Valve",
-            "11": "Four-Way Valve",
-            "12": "Relief Valve",
-            "13": "Safety Valve",
-            "14": "Pressure Reducing Valve",
-            "15": "Control Valve",
-            "16": "Control Valve - Pneumatic",
-            "17": "Control Valve - Electric",
-            "18": "Control Valve - Hydraulic",
-            "19": "Solenoid Valve",
-            "20": "Float Valve",
-            "21": "Knife Gate Valve",
-            "22": "Pinch Valve",
-            "23": "Rotary Valve"
-        }
-        
-    def clean_svg_content(self, svg_content):
-        """Clean and fix SVG content to be valid"""
         # Remove non-standard v: attributes (v:unit, v:flip, v:layer, etc.)
-        svg_content = re.sub(r'\s+v:\w+="[^"]*"', '', svg_content)
+        if b'v:' in svg_content:
+            svg_content = _V_ATTR_RE.sub(b'', svg_content)
         
         # Fix HTML entities in attributes
-        svg_content = svg_content.replace('&quot;', '"')
+        if b'&quot;' in svg_content:
+            svg_content = svg_content.replace(b'&quot;', b'"')
         
         # Add xmlns attribute if missing
-        if 'xmlns=' not in svg_content:
-            svg_content = svg_content.replace('<svg', '<svg xmlns="http://www.w3.org/2000/svg"', 1)
+        if b'xmlns=' not in svg_content:
+            svg_content = svg_content.replace(b'<svg', b'<svg xmlns="http://www.w3.org/2000/svg"', 1)
         
         # Add xlink namespace if there are xlink:href attributes
-        if 'xlink:href' in svg_content and 'xmlns:xlink' not in svg_content:
-            svg_content = svg_content.replace('<svg', '<svg xmlns:xlink="http://www.w3.org/1999/xlink"', 1)
-        
-        # Fix shapes: add stroke color and appropriate fill for P&ID symbols
-        lines = svg_content.split('>')
-        fixed_lines = []
-        for line in lines:
-            # Handle paths, rects, circles, ellipses, polygons, polylines
-            shape_tags = ['<path', '<rect', '<circle', '<ellipse', '<polygon', '<polyline', '<line']
-            is_shape = any(tag in line for tag in shape_tags)
-            
-            if is_shape:
-                # Add stroke color if missing but has stroke-width
-                if 'stroke-width=' in line and 'stroke=' not in line:
-                    # Check if it's a special color already
-                    if 'stroke="#ff0000"' not in line:
-                        line = line.replace('stroke-width=', 'stroke="#000000" stroke-width=')
-                
-                # For valves: determine appropriate fill
-                if 'fill=' not in line and ('stroke=' in line or 'stroke-width=' in line):
-                    # Check if it's a red marker (connection point)
-                    if 'stroke="#ff0000"' in line:
-                        # Red markers should have no fill
-                        for tag in shape_tags:
-                            if tag in line:
-                                line = line.replace(tag, f'{tag} fill="none"')
-                                break
-                    else:
-                        # Regular valve elements
-                        # Valve bodies are typically triangular or diamond shapes
-                        if '<path' in line:
-                            # Check if it's a closed path (valve body)
-                            if 'Z' in line or 'z' in line:
-                                # Closed paths for valve bodies typically need white fill
-                                line = line.replace('<path', '<path fill="white"')
-                            else:
-                                # Open paths are just lines
-                                line = line.replace('<path', '<path fill="none"')
-                        elif '<polygon' in line:
-                            # Polygons are usually valve bodies - fill white
-                            line = line.replace('<polygon', '<polygon fill="white"')
-                        elif '<circle' in line or '<ellipse' in line:
-                            # Circles in valves can be actuators or valve bodies
-                            line = line.replace('<circle', '<circle fill="white"')
-                            line = line.replace('<ellipse', '<ellipse fill="white"')
-                        elif '<rect' in line:
-                            # Rectangles in valves are usually actuators or frames
-                            line = line.replace('<rect', '<rect fill="white"')
-                        elif '<line' in line:
-                            # Lines have no fill
-                            line = line.replace('<line', '<line fill="none"')
-                        else:
-                            # Default to no fill for other elements
-                            for tag in shape_tags:
-                                if tag in line:
-                                    line = line.replace(tag, f'{tag} fill="none"')
-                                    break
-            
-            fixed_lines.append(line)
-        svg_content = '>'.join(fixed_lines)
-        
-        # Add XML declaration if missing
-        if not svg_content.startswith('<?xml'):
-            svg_content = '<?xml version="1.0" encoding="UTF-8"?>\n' + svg_content
-        
-        return svg_content
+        if b'xlink:href' in svg_content and b'xmlns:xlink' not in svg_content:
+            svg_content = svg_content.replace(b'<svg', b'<svg xmlns:xlink="http://www.w3.org/1999/xlink"', 1)
+        
+        # Fix shapes: add stroke color and appropriate fill for P&ID symbols;
+        # shapes without any stroke attribute are left untouched
+        if b'stroke' not in svg_content:
+            return svg_content
+        return _SHAPE_RE.sub(_fix_shape, svg_content)
     
     def load_json_data(self):
         """Load symbol data from JSON file"""
+        if ijson is not None:
+            # Symbols are parsed one at a time during extraction; this pass
+            # only checks the file is well-formed and counts the symbols
+            print(f"Streaming JSON data from {self.json_file}...")
+            try:
+                with open(self.json_file, 'rb') as f:
+                    count = sum(1 for prefix, event, _ in ijson.parse(f)
+                                if prefix == '' and event == 'map_key')
+                print(f"✅ Loaded {count} symbols")
+                return True
+            except Exception as e:
+                print(f"❌ Error loading JSON: {e}")
+                return False
+        
         print(f"Loading JSON data from {self.json_file}...")
         try:
-            with open(self.json_file, 'r') as f:
-                self.symbol_data = json.load(f)
+            # Read the raw bytes in 1 MiB chunks; every parser accepts bytes
+            # and orjson only offers loads()
+            with open(self.json_file, 'rb', buffering=1 << 20) as f:
+                self.symbol_data = _json.loads(f.read())
             print(f"✅ Loaded {len(self.symbol_data)} symbols")
             return True
         except Exception as e:
             print(f"❌ Error loading JSON: {e}")
             return False
     
+    def iter_symbols(self):
+        """Yield (key, svg_content) pairs, streaming from disk when ijson is available"""
+        if ijson is None:
+            yield from self.symbol_data.items()
+            return
+        
+        with open(self.json_file, 'rb') as f:
+            yield from ijson.kvitems(f, '')
+    
     def extract_symbol_names(self):
         """Extract symbol names from the original SVG file or use predefined names"""
         print(f"\nSetting up symbol names...")
         
         # Use predefined names
-        self.symbol_names = self.predefined_names.copy()
+        self.symbol_names = self.PREDEFINED_NAMES.copy()
         
         # Try to extract additional names from SVG if available
         try:
-            with open(self.svg_file, 'r') as f:
-                content = f.read()
-            
-            # Split by viewBox to find individual symbols
-            symbols = re.split(r'<svg viewBox', content)[1:]  # Skip the first part
-            
-            # Extract titles for each symbol section
-            for i, symbol in enumerate(symbols):
-                # Find the first title in this symbol section
-                title_match = re.search(r'<title>([^<]+)</title>', symbol)
-                if title_match:
-                    title = title_match.group(1)
-                    # Check if it's a valve-related title
-                    if 'valve' in title.lower() or 'Valve' in title:
-                        # Only update if we don't have a predefined name
-                        if str(i) not in self.symbol_names:
-                            self.symbol_names[str(i)] = title
+            with open(self.svg_file, 'rb') as f:
+                # Scan the mapped file directly instead of copying it into a
+                # str; an empty file cannot be mapped and has no titles anyway
+                if os.fstat(f.fileno()).st_size:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    try:
+                        self._names_from_titles(mm)
+                    finally:
+                        mm.close()
             
             print(f"✅ Set up {len(self.symbol_names)} symbol names")
             return True
@@ -176,13 +265,38 @@ class ISOValvesExtractor:
             print(f"⚠️  Warning: Could not extract names from SVG: {e}")
             print(f"   Using {len(self.symbol_names)} predefined names")
             return len(self.symbol_names) > 0
+        finally:
+            # Classify every name once for the CSV and the analysis report
+            self._categories = {key: _classify(name) for key, name in self.symbol_names.items()}
+    
+    def _names_from_titles(self, content):
+        """Name symbols from the valve titles found in the original SVG bytes"""
+        # Walk viewBox boundaries and titles in a single pass; i is the
+        # current symbol section (-1 before the first) and only its first
+        # title counts
+        i = -1
+        seen_title = True
+        for match in _SYMBOL_TITLE_RE.finditer(content):
+            title = match.group(1)
+            if title is None:
+                i += 1
+                seen_title = False
+                continue
+            if seen_title:
+                continue
+            seen_title = True
+            
+            # Check if it's a valve-related title
+            if b'valve' in title.lower():
+                # Only update if we don't have a predefined name
+                if str(i) not in self.symbol_names:
+                    self.symbol_names[str(i)] = title.decode('utf-8')
     
-    def clean_filename(self, name):
+    @staticmethod
+    def clean_filename(name):
         """Clean symbol name for use as filename"""
         # Remove special characters and convert to lowercase with underscores
-        name = re.sub(r'[^\w\s-]', '', name)
-        name = re.sub(r'[-\s]+', '_', name)
-        return name.lower()
+        return '_'.join(name.translate(_FILENAME_TRANS).split()).lower()
     
     def extract_symbols(self, use_names=True):
         """Extract symbols from JSON to individual SVG files"""
@@ -191,32 +305,39 @@ class ISOValvesExtractor:
         
         print(f"\nExtracting symbols to {self.output_dir}/...")
         
+        # Cleanup is CPU-bound regex work and symbols are independent, so
+        # clean and write them in worker processes; map keeps index order.
+        # Symbols are handed over in bounded batches so a streamed JSON is
+        # never held in memory all at once.
+        symbols = self.iter_symbols()
+        batch_size = 64 * (os.cpu_count() or 1)
         extracted_count = 0
-        for key, svg_content in self.symbol_data.items():
-            idx = int(key)
-            
-            # Clean and fix SVG content
-            clean_svg = self.clean_svg_content(svg_content)
-            
-            # Create filename
-            if use_names and key in self.symbol_names:
-                clean_name = self.clean_filename(self.symbol_names[key])
-                filename = f"pid_iso_valves_{idx:03d}_{clean_name}.svg"
-            else:
-                filename = f"pid_iso_valves_{idx:03d}.svg"
-            
-            filepath = os.path.join(self.output_dir, filename)
-            
-            # Write to file
-            with open(filepath, 'w') as f:
-                f.write(clean_svg)
-            
-            if use_names and key in self.symbol_names:
-                print(f"  {idx:03d}: {filename} ({self.symbol_names[key]})")
-            else:
-                print(f"  {idx:03d}: {filename}")
-            
-            extracted_count += 1
+        self.symbol_keys = []
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            while batch := list(itertools.islice(symbols, batch_size)):
+                keys = [key for key, _ in batch]
+                names = [self.symbol_names.get(key) if use_names else None for key in keys]
+                results = executor.map(_process_one, keys, [svg for _, svg in batch], names,
+                                       itertools.repeat(self.output_dir), chunksize=8)
+                
+                log_lines = []
+                for (idx, filename), key, name in zip(results, keys, names):
+                    # Keep what the CSV needs rather than the SVG bodies
+                    self.symbol_keys.append(key)
+                    extracted_count += 1
+                    
+                    if self.quiet:
+                        # Progress only, no per-file listing
+                        if extracted_count % 16 == 0:
+                            print(f"   Extracted {extracted_count} symbols...")
+                    elif name is not None:
+                        log_lines.append(f"  {idx:03d}: {filename} ({name})")
+                    else:
+                        log_lines.append(f"  {idx:03d}: {filename}")
+                
+                # Emit the listing once per batch rather than a print per symbol
+                if log_lines:
+                    sys.stdout.write('\n'.join(log_lines) + '\n')
         
         print(f"\n✅ Successfully extracted {extracted_count} symbols")
         return extracted_count
@@ -226,69 +347,62 @@ class ISOValvesExtractor:
         csv_path = 'valves_reference.csv'
         print(f"\nCreating reference file: {csv_path}")
         
-        with open(csv_path, 'w') as f:
-            f.write("Index,Filename,Description,Category\n")
-            for key in sorted(self.symbol_data.keys(), key=lambda x: int(x)):
-                idx = int(key)
-                
-                if key in self.symbol_names:
-                    name = self.symbol_names[key]
-                    clean_name = self.clean_filename(name)
-                    filename = f"pid_iso_valves_{idx:03d}_{clean_name}.svg"
-                    
-                    # Extract category from name
-                    if 'Control' in name:
-                        category = 'Control Valve'
-                    elif 'Check' in name:
-                        category = 'Check Valve'
-                    elif 'Safety' in name or 'Relief' in name:
-                        category = 'Safety/Relief Valve'
-                    elif 'Three-Way' in name or 'Four-Way' in name:
-                        category = 'Multi-Way Valve'
-                    else:
-                        category = name.split(' ')[0] + ' Valve' if ' ' in name else name
-                else:
-                    name = f"Valve {idx}"
-                    filename = f"pid_iso_valves_{idx:03d}.svg"
-                    category = 'Unknown'
+        rows = []
+        for key in sorted(self.symbol_keys, key=int):
+            idx = int(key)
+            
+            if key in self.symbol_names:
+                name = self.symbol_names[key]
+                clean_name = self.clean_filename(name)
+                filename = f"pid_iso_valves_{idx:03d}_{clean_name}.svg"
                 
-                f.write(f"{idx},{filename},{name},{category}\n")
+                # Standard valves are categorized by their first word
+                category = self._categories[key]
+                if category is None:
+                    category = name.split(' ')[0] + ' Valve' if ' ' in name else name
+            else:
+                name = f"Valve {idx}"
+                filename = f"pid_iso_valves_{idx:03d}.svg"
+                category = 'Unknown'
+            
+            rows.append((idx, filename, name, category))
+        
+        # Build the whole file in memory and write it once; csv.writer also
+        # quotes names that contain commas
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator='\n')
+        writer.writerow(['Index', 'Filename', 'Description', 'Category'])
+        writer.writerows(rows)
+        Path(csv_path).write_text(buf.getvalue())
         
         print(f"✅ Created {csv_path}")
     
     def check_conversion_tool(self):
         """Check if conversion tool is available"""
+        # The probe result doesn't change during a run
+        if self._tool is not None:
+            return self._tool
+        
         try:
             # Try to import cairosvg
-            import cairosvg
-            return 'cairosvg'
+            import cairosvg  # type: ignore
+            self._tool = 'cairosvg'
         except ImportError:
-            # Check if rsvg-convert is available
-            try:
-                result = subprocess.run(['which', 'rsvg-convert'], 
-                                      capture_output=True, text=True)
-                if result.returncode == 0:
-                    return 'rsvg-convert'
-            except:
-                pass
-            
-            # Check if inkscape is available
-            try:
-                result = subprocess.run(['which', 'inkscape'], 
-                                      capture_output=True, text=True)
-                if result.returncode == 0:
-                    return 'inkscape'
-            except:
-                pass
+            # Check if rsvg-convert or inkscape is on PATH
+            self._tool = next((tool for tool in ('rsvg-convert', 'inkscape') if shutil.which(tool)), None)
         
-        return None
+        return self._tool
     
-    def convert_svg_to_png(self, svg_path, png_path, size=256, tool=None):
-        """Convert a single SVG file to PNG"""
+    def convert_svg_to_png(self, svg_path, png_path, size=256, tool=None, cairosvg_module=None, log=print):
+        """Convert a single SVG file to PNG
+        
+        cairosvg_module lets batch callers pass in an already imported cairosvg.
+        """
         try:
             if tool == 'cairosvg':
-                import cairosvg
-                cairosvg.svg2png(url=svg_path, write_to=png_path, 
+                if cairosvg_module is None:
+                    import cairosvg as cairosvg_module  # type: ignore
+                cairosvg_module.svg2png(url=svg_path, write_to=png_path, 
                                output_width=size, output_height=size)
                 return True
             
@@ -307,26 +421,63 @@ class ISOValvesExtractor:
                 return True
                 
         except Exception as e:
-            print(f"  ⚠️  Error converting {svg_path}: {e}")
+            log(f"  ⚠️  Error converting {svg_path}: {e}")
             return False
         
         return False
     
-    def convert_to_png(self, png_size=256):
-        """Convert all SVG files to PNG format"""
+    def convert_with_inkscape_shell(self, jobs, size=256, log=print):
+        """Convert (svg_path, png_path) pairs through a single Inkscape shell session"""
+        commands = ''.join(
+            f"file-open:{svg_path}; export-filename:{png_path}; "
+            f"export-width:{size}; export-height:{size}; export-do; file-close\n"
+            for svg_path, png_path in jobs
+        )
+        
+        # PNGs from earlier runs may already be there, so only count files
+        # this session actually (re)writes
+        before = {png_path: _mtime_ns(png_path) for _, png_path in jobs}
+        try:
+            result = subprocess.run(['inkscape', '--shell'], input=commands + 'quit\n',
+                                    text=True, capture_output=True)
+        except Exception as e:
+            log(f"  ⚠️  Error running Inkscape shell: {e}")
+            return 0
+        
+        converted_count = 0
+        for png_path, mtime in before.items():
+            new_mtime = _mtime_ns(png_path)
+            if new_mtime is not None and new_mtime != mtime:
+                converted_count += 1
+        
+        if result.returncode != 0 or converted_count < len(jobs):
+            log(f"  ⚠️  Inkscape shell exited with code {result.returncode}; "
+                f"{len(jobs) - converted_count} of {len(jobs)} files were not converted")
+            # Inkscape is chatty, the last lines carry the actual error
+            for line in result.stderr.strip().splitlines()[-10:]:
+                log(f"     {line}")
+        
+        return converted_count
+    
+    def convert_to_png(self, png_size=256, log=print):
+        """Convert all SVG files to PNG format
+        
+        Messages go through log (print by default), so a caller running the
+        conversion in the background can collect them instead.
+        """
         # Check for conversion tool
         tool = self.check_conversion_tool()
         
         if not tool:
-            print("\n⚠️  No SVG to PNG conversion tool found!")
-            print("   Please install one of the following:")
-            print("   • pip install cairosvg (recommended)")
-            print("   • brew install librsvg (for rsvg-convert on macOS)")
-            print("   • brew install inkscape (for Inkscape on macOS)")
+            log("\n⚠️  No SVG to PNG conversion tool found!")
+            log("   Please install one of the following:")
+            log("   • pip install cairosvg (recommended)")
+            log("   • brew install librsvg (for rsvg-convert on macOS)")
+            log("   • brew install inkscape (for Inkscape on macOS)")
             return 0
         
-        print(f"\n🎨 Converting SVG to PNG using {tool}...")
-        print(f"   Size: {png_size}x{png_size} pixels")
+        log(f"\n🎨 Converting SVG to PNG using {tool}...")
+        log(f"   Size: {png_size}x{png_size} pixels")
         
         # Create PNG directory
         png_dir = 'png'
@@ -336,22 +487,38 @@ class ISOValvesExtractor:
         svg_files = sorted([f for f in os.listdir(self.output_dir) if f.endswith('.svg')])
         
         if not svg_files:
-            print("   No SVG files found to convert")
+            log("   No SVG files found to convert")
             return 0
         
-        converted_count = 0
-        for svg_file in svg_files:
-            svg_path = os.path.join(self.output_dir, svg_file)
-            png_file = svg_file.replace('.svg', '.png')
-            png_path = os.path.join(png_dir, png_file)
+        jobs = [(os.path.join(self.output_dir, svg_file),
+                 os.path.join(png_dir, svg_file.replace('.svg', '.png')))
+                for svg_file in svg_files]
+        
+        if tool == 'inkscape':
+            # Inkscape startup dominates per-file cost, so drive one shell session
+            converted_count = self.convert_with_inkscape_shell(jobs, png_size, log)
+        else:
+            # Import cairosvg once for every worker instead of per file
+            cairosvg_module = None
+            if tool == 'cairosvg':
+                import cairosvg as cairosvg_module  # type: ignore
             
-            # Convert
-            if self.convert_svg_to_png(svg_path, png_path, png_size, tool):
-                converted_count += 1
-                if converted_count % 5 == 0:
-                    print(f"   Converted {converted_count}/{len(svg_files)} files...")
+            # Conversions are independent: cairosvg renders in C and
+            # rsvg-convert waits on a subprocess, so a thread pool keeps
+            # every core busy
+            converted_count = 0
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                futures = [executor.submit(self.convert_svg_to_png, svg_path, png_path,
+                                           png_size, tool, cairosvg_module, log)
+                           for svg_path, png_path in jobs]
+                
+                for future in as_completed(futures):
+                    if future.result():
+                        converted_count += 1
+                        if converted_count % 5 == 0:
+                            log(f"   Converted {converted_count}/{len(svg_files)} files...")
         
-        print(f"\n✅ Successfully converted {converted_count} PNG files to {png_dir}/")
+        log(f"\n✅ Successfully converted {converted_count} PNG files to {png_dir}/")
         return converted_count
     
     def analyze_symbols(self):
@@ -360,20 +527,14 @@ class ISOValvesExtractor:
         print("VALVES SYMBOL ANALYSIS REPORT")
         print("=" * 70)
         
-        # Count categories
-        categories = {}
-        for name in self.symbol_names.values():
-            if 'Control' in name:
-                category = 'Control Valves'
-            elif 'Check' in name:
-                category = 'Check Valves'
-            elif 'Safety' in name or 'Relief' in name:
-                category = 'Safety/Relief Valves'
-            elif 'Three-Way' in name or 'Four-Way' in name:
-                category = 'Multi-Way Valves'
-            else:
-                category = 'Standard Valves'
-            categories[category] = categories.get(category, 0) + 1
+        # Count categories and actuated valves in one pass over the names
+        categories = Counter()
+        actuator_count = 0
+        for key, name in self.symbol_names.items():
+            category = self._categories[key]
+            categories[category + 's' if category is not None else 'Standard Valves'] += 1
+            if any(act in name for act in _ACTUATORS):
+                actuator_count += 1
         
         print("\nValve Categories:")
         for category, count in sorted(categories.items()):
@@ -389,13 +550,6 @@ class ISOValvesExtractor:
         print("  • Safety/Relief Valves (pressure protection)")
         print("  • Multi-Way Valves (flow direction)")
         
-        # Analyze actuator types
-        actuator_types = ['Pneumatic', 'Electric', 'Hydraulic', 'Solenoid']
-        actuator_count = 0
-        for name in self.symbol_names.values():
-            if any(act in name for act in actuator_types):
-                actuator_count += 1
-        
         print(f"\nActuated Valves:")
         print(f"  {actuator_count} valves with actuators")
         print(f"  {len(self.symbol_names) - actuator_count} manual valves")
@@ -419,18 +573,27 @@ class ISOValvesExtractor:
         # Extract symbols
         count = self.extract_symbols(use_names=has_names)
         
-        # Create reference CSV
-        if create_csv and has_names:
-            self.create_reference_csv()
-        
-        # Analyze symbols
-        if analyze and has_names:
-            self.analyze_symbols()
+        # Convert to PNG if requested; it only needs the SVG files, so it
+        # runs in the background while the CSV and the report are written.
+        # Its messages are collected and printed afterwards to keep the
+        # output readable.
+        png_messages = []
+        with ThreadPoolExecutor(max_workers=1) as png_executor:
+            png_future = None
+            if convert_png:
+                png_future = png_executor.submit(self.convert_to_png, png_size, png_messages.append)
+            
+            # Create reference CSV
+            if create_csv and has_names:
+                self.create_reference_csv()
+            
+            # Analyze symbols
+            if analyze and has_names:
+                self.analyze_symbols()
         
-        # Convert to PNG if requested
-        png_count = 0
-        if convert_png:
-            png_count = self.convert_to_png(png_size)
+        png_count = png_future.result() if png_future is not None else 0
+        for message in png_messages:
+            print(message)
         
         print("\n✨ Extraction complete!")
         print(f"   {count} SVG files in {self.output_dir}/")
@@ -442,6 +605,45 @@ class ISOValvesExtractor:
         return True
 
 
+def _process_one(key: str, svg_content: str, name: str | None, output_dir: str) -> tuple[int, str]:
+    """Clean a single symbol and write it to output_dir (runs in a worker process)"""
+    idx = int(key)
+    
+    # Encode once and clean the raw bytes, which go to disk as they are
+    body = ISOValvesExtractor.clean_svg_body(svg_content.encode('utf-8'))
+    parts = [body] if body.startswith(b'<?xml') else [_XML_DECL, body]
+    
+    # Create filename
+    if name is not None:
+        clean_name = ISOValvesExtractor.clean_filename(name)
+        filename = f"pid_iso_valves_{idx:03d}_{clean_name}.svg"
+    else:
+        filename = f"pid_iso_valves_{idx:03d}.svg"
+    
+    # Write declaration and body with one gathered write, skipping the
+    # buffered file object layer
+    fd = os.open(os.path.join(output_dir, filename),
+                 os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        written = os.writev(fd, parts) if hasattr(os, 'writev') else 0
+        if written < sum(map(len, parts)):
+            data = memoryview(b''.join(parts))[written:]
+            while data:
+                data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+    
+    return idx, filename
+
+
+def _mtime_ns(path):
+    """Modification time of path in nanoseconds, or None if it doesn't exist"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
 def main():
     """Main function with command-line interface"""
     parser = argparse.ArgumentParser(
@@ -477,6 +679,11 @@ def main():
         action='store_true',
         help='Skip analysis report'
     )
+    parser.add_argument(
+        '--quiet', 
+        action='store_true',
+        help='Only report extraction progress, not every file'
+    )
     parser.add_argument(
         '--png', 
         action='store_true',
@@ -494,6 +701,7 @@ def main():
     # Create extractor
     extractor = ISOValvesExtractor(args.json, args.svg)
     extractor.output_dir = args.output
+    extractor.quiet = args.quiet
     
     # Run extraction
     success = extractor.run(
@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""
+Launcher for the ISO Valves Symbol Extractor
+Imports extract_iso_valves_symbols as a module instead of running it as a
+script, so a mypyc-compiled build next to the .py is used for the cleanup
+hot path, in the extraction worker processes as well. Falls back to the
+pure-Python source when no compiled build exists.
+"""
+
+from extract_iso_valves_symbols import main
+
+
+if __name__ == "__main__":
+    exit(main())